@@ -0,0 +1,60 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response, status
+
+from app.core.negotiation import negotiated_media_type
+
+
+def _version(obj: Any) -> int:
+    # updated_at is only set once a row is modified; until then created_at versions it
+    stamp: Optional[datetime] = obj.updated_at or obj.created_at
+    return int(stamp.timestamp() * 1_000_000) if stamp is not None else 0
+
+
+def resource_etag(obj: Any, media_type: Optional[str] = None) -> str:
+    """
+    Weak ETag of a row's representation, from its id, last modification time and
+    the media type it is sent as (the negotiated one by default), so JSON and
+    MessagePack bodies of the same row never validate each other.
+    """
+    media_type = media_type or negotiated_media_type.get()
+    return f'W/"{obj.id}-{_version(obj):x}-{media_type.rsplit("/", 1)[-1]}"'
+
+
+def collection_etag(objs: Iterable[Any], *extra: Any, media_type: Optional[str] = None) -> str:
+    """
+    Weak ETag of a list of rows: a digest of each row's id and version, in order,
+    plus `extra` values that shape the response (page number, total, cursor...)
+    and the media type it is sent as (the negotiated one by default).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{media_type or negotiated_media_type.get()};".encode())
+    for obj in objs:
+        digest.update(f"{obj.id}-{_version(obj)};".encode())
+    for value in extra:
+        digest.update(f"|{value}".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match lists `etag`, compared weakly (ignoring W/) as RFC 9110 requires"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def conditional(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Tag the response with `etag`. Returns a 304 to send instead when the client's
+    copy is current, so the endpoint can skip serializing the body entirely.
+    """
+    response.headers["ETag"] = etag
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
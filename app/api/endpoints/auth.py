@@ -1,44 +1,156 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.deps import get_current_user, oauth2_scheme
+from app.core.metrics import auth_attempts_total
+from app.core.rate_limit import login_rate_limiter
+from app.core.revocation import revocation_list
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    decode_access_token,
+    decode_refresh_token,
+)
 from app.database import get_db
-from app.schemas.token import Token
+from app.models.user import User
+from app.schemas.response import ResponseModel
+from app.schemas.token import LogoutRequest, RefreshRequest, Token, TokenPayload
+from app.crud.token import revoked_token as revoked_token_crud
 from app.crud.user import general_user as user_crud
 
 router = APIRouter()
 
 
+def _issue_tokens(user_id: Any) -> dict:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": create_access_token(
+            user_id, expires_delta=access_token_expires
+        ),
+        "refresh_token": create_refresh_token(user_id),
+        "token_type": "bearer",
+    }
+
+
+async def _revoke(db: AsyncSession, tokens: List[TokenPayload]) -> List[str]:
+    """
+    Record tokens in the revocation table and reject them in this worker at once.
+    Returns the IDs of tokens that weren't already revoked.
+    """
+    revoked = await revoked_token_crud.revoke(db, tokens=tokens)
+    for token in tokens:
+        if token.jti and token.exp is not None:
+            revocation_list.add(token.jti, token.exp)
+    return revoked
+
+
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
-    db: AsyncSession = Depends(get_db), 
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> dict:
     """
-    Get an access token for future requests
+    Get an access token and a refresh token for future requests
     """
+    # Throttled attempts are turned away before any query or password hashing
+    try:
+        await login_rate_limiter.check(
+            identifier=form_data.username,
+            client_ip=request.client.host if request.client else None,
+        )
+    except HTTPException:
+        auth_attempts_total.inc("login", "throttled")
+        raise
+
     user = await user_crud.authenticate(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
+        auth_attempts_total.inc("login", "invalid_credentials")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     if not await user_crud.is_active(user):
+        auth_attempts_total.inc("login", "inactive")
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
-    
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+
+    auth_attempts_total.inc("login", "success")
+    await login_rate_limiter.reset(identifier=form_data.username)
+    return _issue_tokens(user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    db: AsyncSession = Depends(get_db),
+    body: RefreshRequest = Body(...),
+) -> dict:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    The refresh token is rotated: the one presented can't be used again.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        token_data = decode_refresh_token(body.refresh_token)
+    except (JWTError, ValidationError):
+        auth_attempts_total.inc("refresh", "invalid_token")
+        raise credentials_exception
+
+    user = await user_crud.get_principal(db, id=token_data.sub)
+    if user is None or not await user_crud.is_active(user):
+        auth_attempts_total.inc("refresh", "user_not_found")
+        raise credentials_exception
+
+    # Revoking the presented token is the check itself: the insert only succeeds
+    # once, so a token already rotated or logged out (by any worker) is rejected
+    if token_data.jti not in await _revoke(db, [token_data]):
+        auth_attempts_total.inc("refresh", "revoked")
+        raise credentials_exception
+
+    auth_attempts_total.inc("refresh", "success")
+    return _issue_tokens(user.id)
+
+
+@router.post("/logout", response_model=ResponseModel)
+async def logout(
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    body: Optional[LogoutRequest] = None,
+) -> Any:
+    """
+    Revoke the current access token and, if given, the refresh token issued with it
+    """
+    tokens = [decode_access_token(token)]
+    if body and body.refresh_token:
+        try:
+            refresh_data = decode_refresh_token(body.refresh_token)
+        except (JWTError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid refresh token",
+            )
+        if refresh_data.sub != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Refresh token belongs to another user",
+            )
+        tokens.append(refresh_data)
+
+    await _revoke(db, tokens)
+    return ResponseModel(success=True, message="Successfully logged out")
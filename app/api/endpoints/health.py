@@ -1,9 +1,16 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import time
 
-from app.database import get_db
+from app.core.cache import principal_cache, recent_writers, token_cache
+from app.core.metrics import render_metrics
+from app.core.response_cache import response_cache
+from app.core.revocation import revocation_list
+from app.core.security import password_hash_pool
+from app.core.deps import get_read_db
+from app.database import get_pool_stats, replica_router
 
 router = APIRouter()
 
@@ -21,9 +28,10 @@ async def health_check():
 
 
 @router.get("/db")
-async def db_health_check(db: AsyncSession = Depends(get_db)):
+async def db_health_check(db: AsyncSession = Depends(get_read_db)):
     """
     Database health check that verifies database connection
+    (to a read replica when one is configured)
     """
     try:
         # Simple query to check database connectivity
@@ -32,6 +40,7 @@ async def db_health_check(db: AsyncSession = Depends(get_db)):
             return {
                 "status": "ok",
                 "database": "connected",
+                "source": db.info.get("replica", "primary"),
                 "timestamp": time.time(),
             }
     except Exception as e:
@@ -41,3 +50,68 @@ async def db_health_check(db: AsyncSession = Depends(get_db)):
             "error": str(e),
             "timestamp": time.time(),
         }
+
+
+@router.get("/pool")
+async def pool_check():
+    """
+    Database connection pool usage, used to tune DB_POOL_SIZE and DB_MAX_OVERFLOW per worker
+    """
+    return {
+        "status": "ok",
+        "pool": get_pool_stats(),
+        "replicas": replica_router.stats(),
+        "timestamp": time.time(),
+    }
+
+
+@router.get("/hashing")
+async def hashing_pool_check():
+    """
+    Password hashing pool usage, used to size PASSWORD_HASH_WORKERS per core count
+    """
+    stats = password_hash_pool.stats()
+    return {
+        "status": "saturated" if stats["in_flight"] >= password_hash_pool.capacity else "ok",
+        "pool": stats,
+        "timestamp": time.time(),
+    }
+
+
+@router.get("/cache")
+async def cache_check():
+    """
+    Hit/miss counters for the caches
+    """
+    return {
+        "status": "ok",
+        "caches": {
+            "principal": principal_cache.stats(),
+            "token": token_cache.stats(),
+            "recent_writers": recent_writers.stats(),
+            "responses": response_cache.stats(),
+        },
+        "timestamp": time.time(),
+    }
+
+
+@router.get("/revocation")
+async def revocation_check():
+    """
+    State of the in-process token revocation filter
+    """
+    return {
+        "status": "ok",
+        "revocation": revocation_list.stats(),
+        "timestamp": time.time(),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Metrics for this worker process in the Prometheus text format
+    """
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,30 +1,104 @@
-from typing import Any, List
+from datetime import datetime
+from typing import Any, List, Literal, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, Body
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User, UserRole
-from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
-from app.schemas.response import ResponseModel
+from app.schemas.user import User as UserSchema, UserCreate, UserFilter, UserUpdate, UserBulkResult
+from app.schemas.response import ResponseModel, PaginatedResponseModel, PaginationMode, TotalMode
 from app.services import user_service
 from app.database import get_db
-from app.core.deps import get_current_active_user, get_admin_user, get_manager_or_admin_user
+from app.core.config import settings
+from app.core.negotiation import negotiated_media_type
+from app.core.response_cache import CachedResponse, response_cache
+from app.api.conditional import collection_etag, conditional, resource_etag
+from app.api.serialization import (
+    dump,
+    render,
+    user_adapter,
+    user_batch_adapter,
+    user_list_adapter,
+    user_page_adapter,
+    user_response_adapter,
+)
+from app.core.deps import get_current_active_user, get_admin_user, get_manager_or_admin_user, get_read_db
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[UserSchema])
+@router.get("/", response_model=Union[List[UserSchema], PaginatedResponseModel[UserSchema]])
 async def read_users(
-    db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.USER_LIST_MAX_LIMIT),
+    pagination: PaginationMode = PaginationMode.OFFSET,
+    cursor: Optional[str] = None,
+    order_by: Literal["id", "-id", "created_at", "-created_at"] = "id",
+    total: TotalMode = TotalMode.ESTIMATE,
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve users.
+    
+    - `pagination=offset` (default) returns a plain list using `skip`/`limit`
+    - `pagination=cursor` (implied when `cursor` is set) returns a paginated response;
+      pass its `next_cursor` back to get the next page
+    - `total` selects an exact count or a fast estimate for cursor pages
+    - `role`, `is_active` and `created_after`/`created_before` filter on the server
+    - `order_by` sorts by `id` or `created_at`; prefix with `-` for descending
+    - Responses carry a collection ETag; send it back in `If-None-Match` to get a 304 while the list is unchanged
+    - Serialized responses are cached per role and query string until a user is written
     """
-    users = await user_service.get_users(db, skip=skip, limit=limit)
-    return users
+    filters = UserFilter(
+        role=role,
+        is_active=is_active,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    paginated = pagination == PaginationMode.CURSOR or cursor is not None
+    # Captured here so background cache refreshes tag and encode the same representation
+    media_type = negotiated_media_type.get()
+
+    async def load(session: AsyncSession) -> Tuple[TypeAdapter, Any, str]:
+        if paginated:
+            page = await user_service.get_users_page(
+                session, cursor=cursor, limit=limit, order_by=order_by, total_mode=total, filters=filters
+            )
+            etag = collection_etag(
+                page.data, page.total, page.page, page.next_cursor, media_type=media_type
+            )
+            return user_page_adapter, page, etag
+        users = await user_service.get_users(
+            session, skip=skip, limit=limit, filters=filters, order_by=order_by
+        )
+        return user_list_adapter, users, collection_etag(users, media_type=media_type)
+
+    if response_cache.enabled:
+        async def produce(session: AsyncSession) -> CachedResponse:
+            adapter, value, etag = await load(session)
+            return CachedResponse(etag, dump(adapter, value, media_type))
+
+        cached = await response_cache.fetch(
+            user_service.USERS_CACHE_NAMESPACE,
+            response_cache.request_key(f"{current_user.role.value}:{media_type}", request.query_params),
+            produce,
+            db,
+        )
+        return conditional(request, response, cached.etag) or Response(
+            content=cached.body, headers=dict(response.headers), media_type=media_type
+        )
+
+    adapter, value, etag = await load(db)
+    return conditional(request, response, etag) or render(adapter, value, response=response)
 
 
 @router.post("/", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
@@ -40,14 +114,41 @@ async def create_user(
     return user
 
 
+@router.post("/bulk", response_model=ResponseModel[List[UserBulkResult]])
+async def bulk_create_users(
+    *,
+    db: AsyncSession = Depends(get_db),
+    users_in: List[UserCreate] = Body(..., min_length=1, max_length=settings.BULK_CREATE_MAX_USERS),
+    current_user: User = Depends(get_admin_user),
+) -> Any:
+    """
+    Create many users in one request.
+    
+    - Requires admin role
+    - Returns one result per entry, in request order, with the created user or the reason it failed
+    """
+    results = await user_service.bulk_create_users(db, users_in)
+    created = sum(result.success for result in results)
+    return ResponseModel(
+        success=created == len(results),
+        message=f"Created {created} of {len(results)} users",
+        data=results
+    )
+
+
 @router.get("/me", response_model=UserSchema)
 async def read_user_me(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get current user.
+    
+    - Responses carry an ETag; send it back in `If-None-Match` to get a 304 while the profile is unchanged
     """
-    return current_user
+    etag = resource_etag(current_user)
+    return conditional(request, response, etag) or render(user_adapter, current_user, response=response)
 
 
 @router.put("/me", response_model=UserSchema)
@@ -71,17 +172,96 @@ async def update_user_me(
     return user
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    current_user: User = Depends(get_admin_user),
+) -> Any:
+    """
+    Export all users as NDJSON or CSV.
+    
+    - Requires admin role
+    - The body is streamed while rows are read, so memory use does not depend on the number of users
+    """
+    if export_format == "csv":
+        return StreamingResponse(
+            user_service.export_users("csv"),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="users.csv"'},
+        )
+    return StreamingResponse(
+        user_service.export_users("ndjson"),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/search", response_model=PaginatedResponseModel[UserSchema])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=255),
+    match: Literal["prefix", "contains"] = "prefix",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Any:
+    """
+    Search users by username or email, case-insensitively.
+    
+    - `match=prefix` (default) matches the start of the username or email
+    - `match=contains` also matches anywhere inside them (at least 3 characters)
+    - Exact matches come first, then username prefixes, then email prefixes, then substrings
+    - Pass `next_cursor` back as `cursor` to get the next page
+    """
+    page = await user_service.search_users(
+        db, query=q, match=match, limit=limit, cursor=cursor
+    )
+    return render(user_page_adapter, page)
+
+
+@router.get("/batch", response_model=ResponseModel[List[Optional[UserSchema]]])
+async def read_users_batch(
+    ids: str = Query(..., description="Comma-separated user ids, e.g. 1,2,3"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Any:
+    """
+    Get many users by id in one request.
+    
+    - Returns one entry per requested id, in request order, with `null` for ids that don't exist
+    - All users are fetched with a single query
+    """
+    try:
+        user_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    users = await user_service.get_users_by_ids(db, user_ids)
+    found = sum(user is not None for user in users)
+    return render(user_batch_adapter, ResponseModel(
+        success=True,
+        message=f"Found {found} of {len(users)} users",
+        data=users
+    ))
+
+
 @router.get("/{user_id}", response_model=UserSchema)
 async def read_user_by_id(
     user_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Any:
     """
     Get a specific user by id.
+    
+    - Responses carry an ETag; send it back in `If-None-Match` to get a 304 while the user is unchanged
     """
     user = await user_service.get_user_by_id(db, user_id=user_id)
-    return user
+    etag = resource_etag(user)
+    return conditional(request, response, etag) or render(user_adapter, user, response=response)
 
 
 @router.delete("/{user_id}", response_model=ResponseModel[UserSchema])
@@ -99,11 +279,11 @@ async def delete_user(
     - Users cannot delete themselves
     """
     deleted_user = await user_service.delete_user(db, user_id, current_user)
-    return ResponseModel(
+    return render(user_response_adapter, ResponseModel(
         success=True, 
         message=f"User with ID {user_id} successfully deleted",
         data=deleted_user
-    )
+    ))
 
 
 @router.patch("/{user_id}/role", response_model=UserSchema)
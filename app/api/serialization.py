@@ -0,0 +1,92 @@
+from typing import Any, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.negotiation import JSON_MEDIA_TYPE, encode, negotiated_media_type
+from app.schemas.response import PaginatedResponseModel, ResponseModel
+from app.schemas.user import User as UserSchema
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; same bytes as JSONResponse for API payloads"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+class NegotiatedResponseMixin:
+    """
+    Renders the body in the media type negotiated for the request (see
+    ContentNegotiationMiddleware), falling back to the JSON class it is mixed into.
+    """
+
+    def render(self, content: Any) -> bytes:
+        media_type = negotiated_media_type.get()
+        if media_type == JSON_MEDIA_TYPE:
+            return super().render(content)
+        self.media_type = media_type
+        return encode(content, media_type)
+
+
+class NegotiatedJSONResponse(NegotiatedResponseMixin, JSONResponse):
+    pass
+
+
+class NegotiatedORJSONResponse(NegotiatedResponseMixin, ORJSONResponse):
+    pass
+
+
+class UserOut(UserSchema):
+    """
+    UserSchema for serializing users already stored in the database.
+
+    Emails were validated when written, and re-running EmailStr validation is most
+    of the cost of serializing a user; a plain str renders the same JSON.
+    """
+    email: str
+
+
+# Adapters for the user payloads, built once at import instead of per request
+user_adapter = TypeAdapter(UserOut)
+user_list_adapter = TypeAdapter(List[UserOut])
+user_response_adapter = TypeAdapter(ResponseModel[UserOut])
+user_page_adapter = TypeAdapter(PaginatedResponseModel[UserOut])
+user_batch_adapter = TypeAdapter(ResponseModel[List[Optional[UserOut]]])
+
+
+def dump(adapter: TypeAdapter, value: Any, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """
+    Bytes of `value` (ORM objects included) in `media_type` through a precompiled
+    adapter. JSON is dumped directly; other types encode the JSON-mode data.
+    """
+    if isinstance(value, ResponseModel):
+        value = value.model_dump()
+    validated = adapter.validate_python(value, from_attributes=True)
+    if media_type == JSON_MEDIA_TYPE:
+        return adapter.dump_json(validated)
+    return encode(adapter.dump_python(validated, mode="json"), media_type)
+
+
+def render(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = 200,
+    response: Optional[Response] = None,
+) -> Any:
+    """
+    Serialize an endpoint's return value with a precompiled adapter.
+
+    With FAST_JSON_RESPONSES on, ORM objects are validated and dumped straight to
+    bytes of the negotiated media type in one pass. Otherwise the value is returned
+    unchanged for FastAPI's regular response_model handling. Headers set on the
+    endpoint's injected `response` are kept on either path.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return value
+    media_type = negotiated_media_type.get()
+    content = dump(adapter, value, media_type)
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=content, status_code=status_code, headers=headers, media_type=media_type)
@@ -10,8 +10,84 @@ class Settings(BaseSettings):
     # JWT Token settings
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
+    # Access tokens are short-lived; clients renew them with a refresh token
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    
+    # Token revocation settings (per worker process)
+    # Revoked token IDs are reloaded from the database this often; revocations
+    # made by other workers take effect within one interval
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 30
+    # Sizing of the Bloom filter that answers "not revoked" without a query
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    
+    # Password hashing pool settings
+    # "thread" or "process"; bcrypt releases the GIL so threads are usually enough
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    # Defaults to the number of CPU cores when not set
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    # Hash/verify calls allowed to wait for a worker before new ones are rejected
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    
+    # Login throttling settings
+    # Attempts allowed per sliding window, per login identifier and per client IP
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_PER_IDENTIFIER: int = 5
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60
+    # "memory" (per worker process) or "redis" (shared, needs the redis package)
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_LIMIT_REDIS_URL: Optional[str] = None
+    # Keys tracked by the memory backend before the least recently used are dropped
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    
+    # Authenticated user cache settings (per worker process)
+    # Writes through CRUDUser invalidate entries immediately; with the "memory"
+    # backend the TTL bounds staleness for writes made by other workers
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    # "memory" or "redis" (version counters shared by all workers, needs the redis package)
+    PRINCIPAL_CACHE_BACKEND: str = "memory"
+    PRINCIPAL_CACHE_REDIS_URL: Optional[str] = None
+    
+    # Verified token cache settings (per worker process)
+    # Entries never outlive the token's own expiry
+    TOKEN_CACHE_TTL_SECONDS: float = 300
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    
+    # List response cache settings (GET /users)
+    # Writes through CRUDUser invalidate cached responses; with the "memory" backend
+    # (per worker process) writes made by other workers show after TTL + STALE
+    # Defaults to on only with the redis backend: memory caches would keep serving
+    # other workers' stale pages for up to TTL + STALE
+    RESPONSE_CACHE_ENABLED: Optional[bool] = None
+    # "memory" or "redis" (shared, needs the redis package)
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None
+    RESPONSE_CACHE_MAX_SIZE: int = 1000
+    # Entries are fresh for TTL seconds, then served for STALE more seconds while
+    # being refreshed in the background
+    RESPONSE_CACHE_TTL_SECONDS: float = 5
+    RESPONSE_CACHE_STALE_SECONDS: float = 30
+    
+    # Serialize user payloads with precompiled pydantic adapters and render all
+    # other JSON responses with orjson
+    FAST_JSON_RESPONSES: bool = False
+    
+    # Largest page (limit) accepted by GET /users
+    USER_LIST_MAX_LIMIT: int = 1000
+    
+    # Largest batch accepted by POST /users/bulk
+    BULK_CREATE_MAX_USERS: int = 1000
+    
+    # Matches of each kind (per column: prefix, substring) ranked by GET /users/search;
+    # bounds the work per search regardless of table size
+    USER_SEARCH_MAX_CANDIDATES: int = 200
+    
+    # Most ids accepted by one GET /users/batch request
+    USER_BATCH_MAX_IDS: int = 100
     
     # Database settings
     DB_USER: str
@@ -20,6 +96,33 @@ class Settings(BaseSettings):
     DB_NAME: str
     DATABASE_URL: Optional[str] = None
     
+    # Connection pool settings (per worker process)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Connections opened at startup; defaults to DB_POOL_SIZE, 0 disables warm-up
+    DB_POOL_WARMUP: Optional[int] = None
+    
+    # Read replica settings
+    # Comma-separated URLs (postgresql+asyncpg://...) of read replicas; read-only
+    # endpoints use the primary when none are set
+    DB_REPLICA_URLS: str = ""
+    # "round_robin" or "least_connections"
+    DB_REPLICA_SELECTION: str = "round_robin"
+    # A replica that fails is skipped for this long before it is tried again
+    DB_REPLICA_RETRY_SECONDS: float = 30
+    DB_REPLICA_CONNECT_TIMEOUT: float = 2
+    # After a user's own write, their reads go to the primary for this long
+    # (keep it above the usual replication lag)
+    READ_YOUR_WRITES_SECONDS: float = 5
+    # Where write markers live: "memory" (per worker process, so only the worker
+    # that handled the write sees it) or "redis" (shared, needs the redis package)
+    READ_YOUR_WRITES_BACKEND: str = "memory"
+    READ_YOUR_WRITES_REDIS_URL: Optional[str] = None
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,45 +1,97 @@
-from typing import Generator, Optional, List, Callable
+from typing import AsyncIterator, Generator, Optional, List, Callable
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.database import get_db
+from app.core.metrics import auth_attempts_total
+from app.core.revocation import revocation_list
+from app.core.security import decode_access_token
+from app.core.write_markers import write_markers
+from app.database import get_db, read_session
 from app.models.user import User, UserRole
-from app.schemas.token import TokenPayload
 from app.crud.user import general_user as user_crud
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_PREFIX}/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_PREFIX}/auth/login", auto_error=False
+)
+
+# Methods that don't write, so they don't open a read-your-writes window
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+async def get_read_db(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> AsyncIterator[AsyncSession]:
+    """
+    Get a database session for read-only endpoints, served by a read replica
+    when one is configured. Users who wrote recently read from the primary so
+    they see their own writes; primary reads reuse the request's `get_db` session.
+    """
+    prefer_primary = False
+    if token:
+        try:
+            user_id = decode_access_token(token).sub
+        except (JWTError, ValidationError):
+            user_id = None
+        prefer_primary = user_id is not None and await write_markers.recently_wrote(user_id)
+
+    async with read_session(prefer_primary=prefer_primary, primary=db) as session:
+        yield session
 
 
 async def get_current_user(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     """
-    Get the current user from the JWT token
+    Get the current user from the JWT token.
+
+    Always reads from the primary, through the request's `get_db` session: a
+    lagging replica could serve (and re-cache) a role or is_active that was
+    just changed, and write endpoints then share one connection with auth.
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = decode_access_token(token)
     except (JWTError, ValidationError):
+        auth_attempts_total.inc("token", "invalid_token")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if token_data.type != "access":
+        auth_attempts_total.inc("token", "invalid_token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Tokens issued before jti claims existed can't be revoked and simply expire
+    if token_data.jti and await revocation_list.is_revoked(db, token_data.jti):
+        auth_attempts_total.inc("token", "revoked")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    user = await user_crud.get(db, id=token_data.sub)
+    user = await user_crud.get_principal(db, id=token_data.sub)
     if user is None:
+        auth_attempts_total.inc("token", "user_not_found")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
+    if request.method not in SAFE_METHODS:
+        await write_markers.mark(user.id)
+    auth_attempts_total.inc("token", "success")
     return user
 
 
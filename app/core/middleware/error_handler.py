@@ -2,29 +2,57 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable):
+class ErrorHandlerMiddleware:
+    """
+    Turn unhandled exceptions into JSON 500 responses.
+
+    Written as a plain ASGI middleware rather than BaseHTTPMiddleware, so requests
+    are not wrapped in an extra task and streaming responses pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
-        except SQLAlchemyError as e:
-            logger.error(f"Database error: {str(e)}")
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Database error occurred", "type": "database_error"}
-            )
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            logger.error(f"Unhandled error: {str(e)}")
-            return JSONResponse(
+            if isinstance(e, SQLAlchemyError):
+                logger.error(f"Database error: {str(e)}")
+                content = {"detail": "Database error occurred", "type": "database_error"}
+            else:
+                logger.error(f"Unhandled error: {str(e)}")
+                content = {"detail": "Internal server error", "type": "server_error"}
+
+            if response_started:
+                # Status and headers are already on the wire, so a JSON error can't
+                # replace them; re-raise and let the server abort the connection
+                logger.error("Error occurred after the response started, aborting it")
+                raise
+
+            response = JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Internal server error", "type": "server_error"}
+                content=content
             )
+            await response(scope, receive, send)
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -0,0 +1,56 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_progress,
+    http_requests_total,
+)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template, or "<unmatched>" when no route matched"""
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    # FastAPI versions that keep included routers nested store the prefixed
+    # route separately; older ones flatten it into route.path
+    effective_route = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(effective_route, "path", None) or getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Record request counts, latency and in-flight requests per route template.
+
+    Routes are labeled by their template (e.g. `/api/users/{user_id}`) rather than
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec()
+            # The router stores the matched route in the (shared) scope
+            labels = (scope["method"], route_template(scope), str(status_code))
+            http_requests_total.inc(*labels)
+            http_request_duration_seconds.observe(time.perf_counter() - start, *labels)
@@ -0,0 +1,36 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.negotiation import negotiate, negotiated_media_type
+
+
+class ContentNegotiationMiddleware:
+    """
+    Pick the response media type (JSON, MessagePack or NDJSON) from the Accept
+    header for the rest of the request, and mark responses `Vary: Accept` so
+    caches keep the representations apart.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                vary = headers.get("vary")
+                if not vary:
+                    headers["Vary"] = "Accept"
+                elif "accept" not in [value.strip().lower() for value in vary.split(",")]:
+                    headers["Vary"] = f"{vary}, Accept"
+            await send(message)
+
+        token = negotiated_media_type.set(negotiate(Headers(scope=scope).get("accept")))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            negotiated_media_type.reset(token)
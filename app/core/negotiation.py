@@ -0,0 +1,75 @@
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+import msgpack
+import orjson
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Accept values understood, mapped to the media type sent back
+SUPPORTED_MEDIA_TYPES = {
+    "application/json": JSON_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+    "application/msgpack": MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+    "application/x-ndjson": NDJSON_MEDIA_TYPE,
+    "application/ndjson": NDJSON_MEDIA_TYPE,
+}
+
+# Media type chosen for the current request's body; set by ContentNegotiationMiddleware
+negotiated_media_type: ContextVar[str] = ContextVar("negotiated_media_type", default=JSON_MEDIA_TYPE)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Media type to answer with for an Accept header: the supported type with the
+    highest q-value, the first listed on ties. JSON when nothing supported is listed.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for entry in accept.split(","):
+        media_range, *params = entry.split(";")
+        media_type = SUPPORTED_MEDIA_TYPES.get(media_range.strip().lower())
+        if media_type is None:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def ndjson_lines(content: Any) -> Iterator[Any]:
+    """
+    Records of a JSON-compatible payload for NDJSON: each item of a list, and for
+    a {"data": [...]} wrapper the other fields first, then each item of data.
+    Anything else is one record.
+    """
+    if isinstance(content, list):
+        yield from content
+    elif isinstance(content, dict) and isinstance(content.get("data"), list):
+        yield {key: value for key, value in content.items() if key != "data"}
+        yield from content["data"]
+    else:
+        yield content
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    """Encode a JSON-compatible payload (as FastAPI produces) in `media_type`"""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(content)
+    if media_type == NDJSON_MEDIA_TYPE:
+        return b"".join(orjson.dumps(line) + b"\n" for line in ndjson_lines(content))
+    return orjson.dumps(content)
@@ -0,0 +1,96 @@
+import logging
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalVersionBackend:
+    """Storage for per-user version counters that invalidate cached principals"""
+
+    async def version(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def bump(self, key: str, ttl: float) -> None:
+        raise NotImplementedError
+
+
+class MemoryPrincipalVersionBackend(PrincipalVersionBackend):
+    """
+    No shared state: the worker that handled a write drops its own entry, and
+    other workers keep theirs until the principal cache TTL. Use a shared backend
+    when running several workers.
+    """
+
+    async def version(self, key: str) -> int:
+        return 0
+
+    async def bump(self, key: str, ttl: float) -> None:
+        pass
+
+
+class RedisPrincipalVersionBackend(PrincipalVersionBackend):
+    """
+    Counters kept in Redis, seen by every worker, so a write in one worker
+    invalidates every worker's entry. Requires the `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "principal:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def version(self, key: str) -> int:
+        value = await self._redis.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+    async def bump(self, key: str, ttl: float) -> None:
+        # Entries cached before the bump are gone once `ttl` has passed, so the
+        # counter only needs to outlive them
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(self.prefix + key)
+            pipe.pexpire(self.prefix + key, max(1, int(ttl * 1000)))
+            await pipe.execute()
+
+
+class PrincipalVersions:
+    """
+    Version of each user's cached principal. Entries are keyed by the version
+    read before the row was loaded, so a bump makes every worker miss them.
+
+    A backend error on lookup is logged and bypasses the cache for that request
+    (None), so a lost write can't serve a stale role. An error on bump is logged
+    and leaves other workers' entries to expire after `ttl`.
+    """
+
+    def __init__(self, backend: PrincipalVersionBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def current(self, key: str) -> Optional[int]:
+        try:
+            return await self.backend.version(key)
+        except Exception as e:
+            logger.warning(f"Reading the principal version of {key} failed: {e!r}")
+            return None
+
+    async def bump(self, key: str) -> None:
+        try:
+            await self.backend.bump(key, self.ttl)
+        except Exception as e:
+            logger.warning(f"Bumping the principal version of {key} failed: {e!r}")
+
+
+def _create_backend() -> PrincipalVersionBackend:
+    if settings.PRINCIPAL_CACHE_BACKEND == "redis":
+        if not settings.PRINCIPAL_CACHE_REDIS_URL:
+            raise ValueError("PRINCIPAL_CACHE_REDIS_URL is required for the redis backend")
+        return RedisPrincipalVersionBackend(settings.PRINCIPAL_CACHE_REDIS_URL)
+    if settings.PRINCIPAL_CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown principal cache backend: {settings.PRINCIPAL_CACHE_BACKEND}")
+    return MemoryPrincipalVersionBackend()
+
+
+principal_versions = PrincipalVersions(backend=_create_backend(), ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
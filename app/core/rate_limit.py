@@ -0,0 +1,171 @@
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend:
+    """
+    Storage for sliding-window rate limits.
+
+    hit() records an attempt against `key` if fewer than `limit` attempts were
+    made in the last `window` seconds, and returns 0. Otherwise nothing is
+    recorded and it returns the seconds until the oldest attempt leaves the window.
+    """
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        raise NotImplementedError
+
+    async def reset(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process sliding log of attempt times per key.
+
+    Limits are only enforced per worker; use a shared backend to enforce them
+    across workers. The least recently used keys are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._attempts: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.monotonic()
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            attempts = self._attempts[key] = deque()
+        self._attempts.move_to_end(key)
+        while attempts and attempts[0] <= now - window:
+            attempts.popleft()
+
+        if len(attempts) >= limit:
+            return attempts[0] + window - now
+
+        attempts.append(now)
+        while len(self._attempts) > self.max_keys:
+            self._attempts.popitem(last=False)
+        return 0.0
+
+    async def reset(self, key: str) -> None:
+        self._attempts.pop(key, None)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Sliding log kept in a Redis sorted set per key, shared by all workers.
+    Requires the `redis` package.
+    """
+
+    # Check-and-record in one round trip, atomically
+    _SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    local limit = tonumber(ARGV[3])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[1]) >= limit then
+        local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        return tostring(tonumber(oldest[2]) + window - now)
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+    return '0'
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(self._SCRIPT)
+        self._counter = 0
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        # Members must be unique even for attempts made in the same instant
+        self._counter += 1
+        member = f"{now}:{id(self)}:{self._counter}"
+        result = await self._script(keys=[self.prefix + key], args=[now, window, limit, member])
+        return float(result)
+
+    async def reset(self, key: str) -> None:
+        await self._redis.delete(self.prefix + key)
+
+
+class LoginRateLimiter:
+    """
+    Throttles login attempts per client IP and per login identifier.
+
+    The IP limit stops one client from spraying many accounts; the identifier
+    limit stops many clients from guessing one account's password. A successful
+    login clears the identifier's window.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        per_identifier: int,
+        per_ip: int,
+        window: float,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.per_identifier = per_identifier
+        self.per_ip = per_ip
+        self.window = window
+        self.enabled = enabled
+
+    @staticmethod
+    def _identifier_key(identifier: str) -> str:
+        return "login:id:" + identifier.strip().lower()
+
+    async def check(self, *, identifier: str, client_ip: Optional[str]) -> None:
+        """Record a login attempt, raising a 429 if either limit is exhausted"""
+        if not self.enabled:
+            return
+
+        retry_after = 0.0
+        if client_ip:
+            retry_after = await self.backend.hit(f"login:ip:{client_ip}", self.per_ip, self.window)
+        if not retry_after:
+            retry_after = await self.backend.hit(
+                self._identifier_key(identifier), self.per_identifier, self.window
+            )
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    async def reset(self, *, identifier: str) -> None:
+        if self.enabled:
+            await self.backend.reset(self._identifier_key(identifier))
+
+
+def _create_backend() -> RateLimitBackend:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "redis":
+        if not settings.LOGIN_RATE_LIMIT_REDIS_URL:
+            raise ValueError("LOGIN_RATE_LIMIT_REDIS_URL is required for the redis backend")
+        return RedisRateLimitBackend(settings.LOGIN_RATE_LIMIT_REDIS_URL)
+    if settings.LOGIN_RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown rate limit backend: {settings.LOGIN_RATE_LIMIT_BACKEND}")
+    return MemoryRateLimitBackend(max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+
+login_rate_limiter = LoginRateLimiter(
+    backend=_create_backend(),
+    per_identifier=settings.LOGIN_RATE_LIMIT_PER_IDENTIFIER,
+    per_ip=settings.LOGIN_RATE_LIMIT_PER_IP,
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    enabled=settings.LOGIN_RATE_LIMIT_ENABLED,
+)
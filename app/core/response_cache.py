@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import read_session
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    """A serialized response body and its ETag"""
+    etag: str
+    body: bytes
+
+    def encode(self) -> bytes:
+        return self.etag.encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, payload: bytes) -> "CachedResponse":
+        etag, body = payload.split(b"\n", 1)
+        return cls(etag.decode(), body)
+
+
+class ResponseCacheBackend:
+    """
+    Storage for cached responses and the generation counters that invalidate them.
+
+    get() returns the payload with the wall-clock time it stops being fresh, or
+    None once it is past its stale window too.
+    """
+
+    async def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, payload: bytes, ttl: float, stale: float) -> None:
+        raise NotImplementedError
+
+    async def generation(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    async def bump(self, namespace: str) -> None:
+        raise NotImplementedError
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """
+    Per-process LRU of responses. Generations are per process too, so writes
+    made by other workers only show once their entries expire.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, float, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        fresh_until, stale_until, payload = entry
+        if stale_until <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return fresh_until, payload
+
+    async def set(self, key: str, payload: bytes, ttl: float, stale: float) -> None:
+        if self.max_size <= 0:
+            return
+        now = time.time()
+        self._entries[key] = (now + ttl, now + ttl + stale, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def bump(self, namespace: str) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    """
+    Responses and generations kept in Redis, shared by all workers, so a write
+    in one worker invalidates every worker's entries. Requires the `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "respcache:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        value = await self._redis.get(self.prefix + key)
+        if value is None:
+            return None
+        fresh_until, payload = value.split(b":", 1)
+        return float(fresh_until), payload
+
+    async def set(self, key: str, payload: bytes, ttl: float, stale: float) -> None:
+        fresh_until = str(time.time() + ttl).encode()
+        # Redis drops the entry once its stale window is over too
+        await self._redis.set(
+            self.prefix + key, fresh_until + b":" + payload, px=max(1, int((ttl + stale) * 1000))
+        )
+
+    async def generation(self, namespace: str) -> int:
+        value = await self._redis.get(f"{self.prefix}gen:{namespace}")
+        return int(value) if value is not None else 0
+
+    async def bump(self, namespace: str) -> None:
+        await self._redis.incr(f"{self.prefix}gen:{namespace}")
+
+
+class ResponseCache:
+    """
+    Caches serialized responses per namespace, keyed by a generation counter and
+    the request. Writes bump the namespace's generation, so every entry made
+    before them is missed from then on.
+
+    Entries are fresh for `ttl` seconds. For `stale` seconds after that they are
+    still served, and the first request to see a stale entry refreshes it in the
+    background (stale-while-revalidate), so hot keys never wait on a query.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend, ttl: float, stale: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale = stale
+        self.enabled = enabled
+        self._refreshing: Set[str] = set()
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def request_key(visibility: str, params: Any) -> str:
+        """Cache key part for a caller's visibility (e.g. role) and query params"""
+        return f"{visibility}?{urlencode(sorted(params.multi_items()))}"
+
+    async def fetch(
+        self,
+        namespace: str,
+        key: str,
+        produce: Callable[[AsyncSession], Awaitable[CachedResponse]],
+        db: AsyncSession,
+    ) -> CachedResponse:
+        """
+        The cached response for `key`, or the one `produce(db)` renders on a miss.
+        Background refreshes call `produce` with a session of their own.
+        """
+        full_key = f"{namespace}:{await self.backend.generation(namespace)}:{key}"
+        entry = await self.backend.get(full_key)
+        if entry is not None:
+            fresh_until, payload = entry
+            if fresh_until > time.time():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._revalidate(full_key, produce)
+            return CachedResponse.decode(payload)
+
+        self.misses += 1
+        response = await produce(db)
+        await self.backend.set(full_key, response.encode(), self.ttl, self.stale)
+        return response
+
+    def _revalidate(self, full_key: str, produce: Callable[[AsyncSession], Awaitable[CachedResponse]]) -> None:
+        if full_key in self._refreshing:
+            return
+        self._refreshing.add(full_key)
+        task = asyncio.ensure_future(self._refresh(full_key, produce))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, full_key: str, produce: Callable[[AsyncSession], Awaitable[CachedResponse]]) -> None:
+        try:
+            async with read_session() as db:
+                response = await produce(db)
+            await self.backend.set(full_key, response.encode(), self.ttl, self.stale)
+            self.refreshes += 1
+        except Exception as e:
+            logger.warning(f"Refreshing cached response {full_key} failed: {e!r}")
+        finally:
+            self._refreshing.discard(full_key)
+
+    async def invalidate(self, namespace: str) -> None:
+        """Bump the namespace's generation; called after writes have committed"""
+        if not self.enabled:
+            return
+        try:
+            await self.backend.bump(namespace)
+            self.invalidations += 1
+        except Exception as e:
+            # The write itself succeeded; entries still expire after ttl + stale
+            logger.warning(f"Invalidating cached {namespace} responses failed: {e!r}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": self.backend.size(),
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+        }
+
+
+def _create_backend() -> ResponseCacheBackend:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        if not settings.RESPONSE_CACHE_REDIS_URL:
+            raise ValueError("RESPONSE_CACHE_REDIS_URL is required for the redis backend")
+        return RedisResponseCacheBackend(settings.RESPONSE_CACHE_REDIS_URL)
+    if settings.RESPONSE_CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown response cache backend: {settings.RESPONSE_CACHE_BACKEND}")
+    return MemoryResponseCacheBackend(max_size=settings.RESPONSE_CACHE_MAX_SIZE)
+
+
+def response_cache_enabled() -> bool:
+    """RESPONSE_CACHE_ENABLED, or whether the backend is shared (redis) when it isn't set"""
+    if settings.RESPONSE_CACHE_ENABLED is not None:
+        return settings.RESPONSE_CACHE_ENABLED
+    return settings.RESPONSE_CACHE_BACKEND == "redis"
+
+
+response_cache = ResponseCache(
+    backend=_create_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    stale=settings.RESPONSE_CACHE_STALE_SECONDS,
+    enabled=response_cache_enabled(),
+)
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import CallbackCounter, CallbackGauge
+from app.crud.token import revoked_token
+from app.database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for `capacity` items at a false positive rate of `error_rate`. Never
+    gives false negatives, so "not in the filter" is a definite answer.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions derived from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Per-worker view of the revoked_tokens table.
+
+    The table's unexpired token IDs are loaded into a Bloom filter on every sync,
+    and tokens revoked by this worker since are kept in a small exact set. A
+    token missing from both is not revoked, which answers the common case
+    without touching the database; a filter hit is confirmed with a query.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        # jti -> expiry (unix time) for tokens revoked here since the last sync
+        self._recent: Dict[str, float] = {}
+        self.last_sync: Optional[float] = None
+
+        # Counters exposed through stats()
+        self.checks = 0
+        self.db_checks = 0
+        self.false_positives = 0
+        self.sync_failures = 0
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        self.checks += 1
+        if jti in self._recent:
+            return True
+        if jti not in self._filter:
+            return False
+
+        self.db_checks += 1
+        revoked = await revoked_token.is_revoked(db, jti=jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    @property
+    def entries(self) -> int:
+        return self._filter.count + len(self._recent)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Mark a token this worker just revoked, so it is rejected immediately"""
+        self._recent[jti] = expires_at
+
+    async def sync(self) -> int:
+        """Reload the filter from the revocation table and purge expired rows"""
+        started = time.time()
+        async with async_session() as db:
+            await revoked_token.purge_expired(db)
+            jtis = await revoked_token.get_active_jtis(db)
+
+        bloom = BloomFilter(max(self.capacity, len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self._filter = bloom
+        # Keep local entries the new filter doesn't cover yet (revoked while the
+        # query ran); expired ones can no longer be presented anyway
+        now = time.time()
+        self._recent = {
+            jti: expires_at
+            for jti, expires_at in self._recent.items()
+            if expires_at > now and jti not in bloom
+        }
+        self.last_sync = started
+        return len(jtis)
+
+    async def sync_forever(self) -> None:
+        """Background task that keeps the filter in step with other workers"""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.sync_failures += 1
+                logger.warning(f"Revocation list sync failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "filter_entries": self._filter.count,
+            "filter_bits": self._filter.num_bits,
+            "filter_hashes": self._filter.num_hashes,
+            "recent_entries": len(self._recent),
+            "checks": self.checks,
+            "db_checks": self.db_checks,
+            "false_positives": self.false_positives,
+            "sync_failures": self.sync_failures,
+            "last_sync_age_seconds": round(time.time() - self.last_sync, 3) if self.last_sync else None,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+    sync_interval=settings.REVOCATION_SYNC_INTERVAL_SECONDS,
+)
+
+CallbackGauge(
+    "revocation_filter_entries",
+    "Revoked token IDs loaded into the in-process revocation filter",
+    lambda: [((), revocation_list.entries)],
+)
+CallbackCounter(
+    "revocation_db_checks_total",
+    "Revocation checks that needed a database query to confirm a filter hit",
+    lambda: [((), revocation_list.db_checks)],
+)
@@ -1,11 +1,40 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
-from jose import jwt
+from typing import Any, Callable, Dict, List, Union, Optional
+
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core.cache import token_cache
 from app.core.config import settings
+from app.core.metrics import CallbackCounter, CallbackGauge
+from app.schemas.token import TokenPayload
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt hash (default cost) of a throwaway password, verified against when a login
+# names an unknown user so that it costs as much as a wrong password
+DUMMY_PASSWORD_HASH = "$2b$12$awNamH9bDB5ufl8HD6pdguoCHIJyePDMZ/7ytNI4Y4oyn1T3BrknK"
+
+
+def _create_token(subject: Union[str, Any], token_type: str, expires_delta: timedelta) -> str:
+    expire = datetime.utcnow() + expires_delta
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+        "type": token_type,
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -13,17 +42,66 @@ def create_access_token(
     """
     Create a JWT access token
     """
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
-    return encoded_jwt
+    if not expires_delta:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return _create_token(subject, "access", expires_delta)
+
+
+def create_refresh_token(
+    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+) -> str:
+    """
+    Create a JWT refresh token, exchanged once at /auth/refresh for a new token pair
+    """
+    if not expires_delta:
+        expires_delta = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    return _create_token(subject, "refresh", expires_delta)
+
+
+def decode_refresh_token(token: str) -> TokenPayload:
+    """
+    Decode and verify a JWT refresh token. Not cached: each one is used only once.
+    Raises JWTError or ValidationError for invalid tokens, and JWTError for
+    tokens that are not refresh tokens.
+    """
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenPayload(**payload)
+    if token_data.type != "refresh" or not token_data.jti:
+        raise JWTError("Not a refresh token")
+    return token_data
+
+
+# (SECRET_KEY, ALGORITHM) the token cache was filled with
+_token_cache_signing_key: Optional[tuple] = None
+
+
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    Decode and verify a JWT access token.
+
+    Verified payloads are cached by token digest until the token expires, so a
+    client resending the same token skips signature checks and validation.
+    Raises JWTError or ValidationError for invalid tokens.
+    """
+    global _token_cache_signing_key
+    signing_key = (settings.SECRET_KEY, settings.ALGORITHM)
+    if signing_key != _token_cache_signing_key:
+        # Tokens verified with a rotated key must be checked again
+        token_cache.clear()
+        _token_cache_signing_key = signing_key
+
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        if token_data.exp is None or token_data.exp > time.time():
+            return token_data
+        token_cache.invalidate(key)
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenPayload(**payload)
+    ttl = token_data.exp - time.time() if token_data.exp is not None else None
+    token_cache.set(key, token_data, ttl=ttl)
+    return token_data
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -38,3 +116,139 @@ def get_password_hash(password: str) -> str:
     Hash a password
     """
     return pwd_context.hash(password)
+
+
+class PasswordHashPool:
+    """
+    Bounded worker pool that runs bcrypt off the event loop.
+
+    At most `workers` hashes run at once and at most `max_queue` more may wait
+    for a worker; anything beyond that is rejected with a 503 instead of
+    piling up behind a login burst.
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[Executor] = None
+
+        # Counters exposed through stats()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a hashing function in the pool, rejecting work when saturated"""
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            logger.warning(
+                f"Password hash pool saturated ({self.in_flight} in flight, "
+                f"capacity {self.capacity}), rejecting request"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "busy": min(self.in_flight, self.workers),
+            "queued": max(0, self.in_flight - self.workers),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+CallbackGauge(
+    "password_hash_in_flight",
+    "Password hash/verify calls running or queued in the hashing pool",
+    lambda: [((), password_hash_pool.in_flight)],
+)
+CallbackCounter(
+    "password_hash_rejected_total",
+    "Password hash/verify calls rejected because the hashing pool was saturated",
+    lambda: [((), password_hash_pool.rejected)],
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a hash without blocking the event loop
+    """
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def dummy_verify_password_async(plain_password: str) -> bool:
+    """
+    Spend a full password verification without a real hash, so failed logins take
+    the same time whether or not the user exists. Always returns False.
+    """
+    await password_hash_pool.run(verify_password, plain_password, DUMMY_PASSWORD_HASH)
+    return False
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password without blocking the event loop
+    """
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel, in order.
+
+    Keeps at most one hash per worker in flight so a large batch never fills the
+    pool's queue and starves logins.
+    """
+    semaphore = asyncio.Semaphore(password_hash_pool.workers)
+
+    async def _hash(password: str) -> str:
+        async with semaphore:
+            return await get_password_hash_async(password)
+
+    return await asyncio.gather(*(_hash(password) for password in passwords))
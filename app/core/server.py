@@ -0,0 +1,61 @@
+import os
+from typing import Any, Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+
+class AppWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools instead of auto-detecting them"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+def default_workers() -> int:
+    """One worker per CPU core; each worker runs its own event loop"""
+    return os.cpu_count() or 1
+
+
+class GunicornApplication(BaseApplication):
+    """
+    Runs the ASGI app under gunicorn with AppWorker processes.
+
+    `options` are gunicorn settings (bind, workers, max_requests, ...); unknown
+    or None values are ignored.
+    """
+
+    # Settings reported by effective_config()
+    REPORTED_SETTINGS = (
+        "bind",
+        "workers",
+        "worker_class",
+        "preload_app",
+        "max_requests",
+        "max_requests_jitter",
+        "keepalive",
+        "timeout",
+        "graceful_timeout",
+        "loglevel",
+    )
+
+    def __init__(self, app_uri: str, options: Optional[Dict[str, Any]] = None):
+        self.app_uri = app_uri
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self) -> None:
+        self.cfg.set("worker_class", f"{AppWorker.__module__}.{AppWorker.__name__}")
+        for key, value in self.options.items():
+            if value is not None and key in self.cfg.settings:
+                self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from gunicorn.util import import_app
+
+        return import_app(self.app_uri)
+
+    def effective_config(self) -> Dict[str, Any]:
+        config = {name: self.cfg.settings[name].get() for name in self.REPORTED_SETTINGS}
+        config["loop"] = AppWorker.CONFIG_KWARGS["loop"]
+        config["http"] = AppWorker.CONFIG_KWARGS["http"]
+        return config
@@ -0,0 +1,90 @@
+import logging
+from typing import Any
+
+from app.core.cache import TTLCache, recent_writers
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WriteMarkerBackend:
+    """Storage for "this user wrote recently" markers that expire after `ttl` seconds"""
+
+    async def mark(self, key: str, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def is_marked(self, key: str) -> bool:
+        raise NotImplementedError
+
+
+class MemoryWriteMarkerBackend(WriteMarkerBackend):
+    """
+    Markers in a per-process TTL cache. Only the worker that handled the write
+    sees them; use a shared backend when running several workers.
+    """
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+
+    async def mark(self, key: str, ttl: float) -> None:
+        self.cache.set(key, True, ttl=ttl)
+
+    async def is_marked(self, key: str) -> bool:
+        return self.cache.get(key) is not None
+
+
+class RedisWriteMarkerBackend(WriteMarkerBackend):
+    """
+    Markers kept as expiring Redis keys, seen by every worker.
+    Requires the `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "wrote:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def mark(self, key: str, ttl: float) -> None:
+        await self._redis.set(self.prefix + key, b"1", px=max(1, int(ttl * 1000)))
+
+    async def is_marked(self, key: str) -> bool:
+        return bool(await self._redis.exists(self.prefix + key))
+
+
+class WriteMarkers:
+    """
+    Tracks which users wrote in the last `window` seconds, so their reads can
+    skip lagging replicas. Backend errors are logged and read as "no recent
+    write": a replica read is then slightly stale, but the request still works.
+    """
+
+    def __init__(self, backend: WriteMarkerBackend, window: float):
+        self.backend = backend
+        self.window = window
+
+    async def mark(self, user_id: Any) -> None:
+        try:
+            await self.backend.mark(str(user_id), self.window)
+        except Exception as e:
+            logger.warning(f"Recording a write by user {user_id} failed: {e!r}")
+
+    async def recently_wrote(self, user_id: Any) -> bool:
+        try:
+            return await self.backend.is_marked(str(user_id))
+        except Exception as e:
+            logger.warning(f"Checking recent writes by user {user_id} failed: {e!r}")
+            return False
+
+
+def _create_backend() -> WriteMarkerBackend:
+    if settings.READ_YOUR_WRITES_BACKEND == "redis":
+        if not settings.READ_YOUR_WRITES_REDIS_URL:
+            raise ValueError("READ_YOUR_WRITES_REDIS_URL is required for the redis backend")
+        return RedisWriteMarkerBackend(settings.READ_YOUR_WRITES_REDIS_URL)
+    if settings.READ_YOUR_WRITES_BACKEND != "memory":
+        raise ValueError(f"Unknown read-your-writes backend: {settings.READ_YOUR_WRITES_BACKEND}")
+    return MemoryWriteMarkerBackend(recent_writers)
+
+
+write_markers = WriteMarkers(backend=_create_backend(), window=settings.READ_YOUR_WRITES_SECONDS)
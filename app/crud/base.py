@@ -1,9 +1,13 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Generic, Iterable, List, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import Row, any_, select, update, delete, func, text, tuple_
 from sqlalchemy.sql.expression import Select
 
 from app.database import Base
@@ -12,6 +16,132 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Orderings available for listing and keyset pagination (the whitelist of
+# sortable columns); every one ends in the primary key so the sort key is unique
+# and pages never skip or repeat rows. Prefix a name with "-" to sort descending.
+KEYSET_ORDERINGS: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "created_at": ("created_at", "id"),
+}
+
+
+def resolve_ordering(order_by: str) -> Tuple[Tuple[str, ...], bool]:
+    """Column names and direction (True for descending) of a whitelisted ordering"""
+    descending = order_by.startswith("-")
+    names = KEYSET_ORDERINGS.get(order_by[1:] if descending else order_by)
+    if names is None:
+        raise ValueError(f"Unsupported ordering: {order_by}")
+    return names, descending
+
+
+def encode_cursor(order_by: str, values: List[Any], page: int) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    payload = {
+        "o": order_by,
+        "k": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        "p": page,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict) or not isinstance(payload.get("k"), list):
+            raise ValueError
+        page = payload.get("p", 1)
+        if not isinstance(page, int) or isinstance(page, bool) or page < 1:
+            raise ValueError
+        return payload
+    except ValueError:
+        raise ValueError("Invalid pagination cursor")
+
+
+def cursor_values(payload: Dict[str, Any], types: Sequence[type]) -> List[Any]:
+    """
+    Sort key of a decoded cursor as values of `types` (the sort columns' Python
+    types), raising ValueError if it has another length or a value of another type
+    """
+    keys = payload["k"]
+    if len(keys) != len(types):
+        raise ValueError("Pagination cursor does not match the requested ordering")
+    try:
+        values = []
+        for expected, value in zip(types, keys):
+            if expected is datetime and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+                raise ValueError
+            values.append(value)
+        return values
+    except ValueError:
+        raise ValueError("Invalid pagination cursor")
+
+
+class BatchLoader(Generic[ModelType]):
+    """
+    Loads objects by id for one session, batching the lookups.
+
+    Every load() or load_many() made before the event loop next runs its
+    callbacks (the same tick, e.g. the calls of one asyncio.gather) is answered by a single
+    WHERE id = ANY(:ids) query. Results are memoized for the loader's lifetime,
+    so it suits sessions that only read, such as a request's.
+    """
+
+    def __init__(self, crud: "CRUDBase", db: AsyncSession):
+        self.crud = crud
+        self.db = db
+        self._futures: Dict[Any, "asyncio.Future[Optional[ModelType]]"] = {}
+        self._queue: List[Any] = []
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        # A session runs one statement at a time; batches dispatched in later
+        # ticks wait for the one in flight
+        self._lock = asyncio.Lock()
+
+    def load(self, id: Any) -> "asyncio.Future[Optional[ModelType]]":
+        """Future resolving to the object with `id`, or None if there is none"""
+        future = self._futures.get(id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[id] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append(id)
+        return future
+
+    def load_many(self, ids: Iterable[Any]) -> "asyncio.Future[List[Optional[ModelType]]]":
+        """
+        Future resolving to the objects for `ids` in the same order (None where
+        missing). The ids are queued right away, into the same batch as load()s
+        made in this tick, rather than once a coroutine gets to run.
+        """
+        return asyncio.gather(*(self.load(id) for id in ids))
+
+    def _dispatch(self) -> None:
+        ids, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._fetch(ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, ids: List[Any]) -> None:
+        async with self._lock:
+            try:
+                found = {obj.id: obj for obj in await self.crud.get_many(self.db, ids=ids)}
+            except Exception as e:
+                for id in ids:
+                    # Forget failed ids so a later load() retries them
+                    future = self._futures.pop(id)
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for id in ids:
+            future = self._futures[id]
+            if not future.done():
+                future.set_result(found.get(id))
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
@@ -27,6 +157,19 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).where(self.model.id == id))
         return result.scalars().first()
 
+    async def get_many(self, db: AsyncSession, *, ids: Sequence[Any]) -> List[ModelType]:
+        """Objects whose id is in `ids`, in no particular order, in one query"""
+        result = await db.execute(select(self.model).where(self.model.id == any_(list(ids))))
+        return result.scalars().all()
+
+    def loader(self, db: AsyncSession) -> BatchLoader[ModelType]:
+        """The session's BatchLoader for this model, created on first use"""
+        key = ("batch_loader", self.model)
+        loader = db.info.get(key)
+        if loader is None:
+            loader = db.info[key] = BatchLoader(self, db)
+        return loader
+
     async def get_by(self, db: AsyncSession, **kwargs) -> Optional[ModelType]:
         """Get object by custom filters"""
         query = select(self.model)
@@ -35,12 +178,134 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(query)
         return result.scalars().first()
 
+    def _ordered_keys(
+        self, order_by: str, filters: Sequence[Any]
+    ) -> Tuple[Select, List[Any], bool]:
+        """
+        Select only the sort key columns of matching rows, in order.
+
+        Selecting just the key lets a composite index that starts with the filtered
+        columns and ends with the key answer with an index-only scan; full rows are
+        then fetched by primary key for the page alone (a deferred join).
+        """
+        names, descending = resolve_ordering(order_by)
+        columns = [getattr(self.model, name) for name in names]
+        query = (
+            select(*columns)
+            .where(*filters)
+            .order_by(*[column.desc() if descending else column for column in columns])
+        )
+        return query, columns, descending
+
+    def _rows_for_keys(self, keys: Select, columns: List[Any], descending: bool) -> Select:
+        page = keys.subquery()
+        return (
+            select(self.model)
+            .join(page, page.c.id == self.model.id)
+            .order_by(*[column.desc() if descending else column for column in columns])
+        )
+
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Sequence[Any] = (),
+        order_by: str = "id",
     ) -> List[ModelType]:
-        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        """
+        Get a page of objects matching `filters` (SQL criteria) by offset.
+        Raises ValueError for an ordering that isn't in KEYSET_ORDERINGS.
+        """
+        keys, columns, descending = self._ordered_keys(order_by, filters)
+        query = self._rows_for_keys(keys.offset(skip).limit(limit), columns, descending)
+        result = await db.execute(query)
         return result.scalars().all()
 
+    async def get_multi_keyset(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        filters: Sequence[Any] = (),
+    ) -> Tuple[List[ModelType], Optional[str], int]:
+        """
+        Get a page of objects matching `filters` after `cursor` using keyset pagination.
+
+        Unlike OFFSET, the cost of a page does not grow with its depth. Returns the
+        objects, the cursor for the next page (None on the last page) and the
+        1-based page number. Raises ValueError for an invalid cursor, ordering or limit.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        keys, columns, descending = self._ordered_keys(order_by, filters)
+
+        page = 1
+        if cursor:
+            payload = decode_cursor(cursor)
+            if payload.get("o") != order_by:
+                raise ValueError("Pagination cursor does not match the requested ordering")
+            values = cursor_values(payload, [column.type.python_type for column in columns])
+            if descending:
+                keys = keys.where(tuple_(*columns) < tuple_(*values))
+            else:
+                keys = keys.where(tuple_(*columns) > tuple_(*values))
+            page = int(payload.get("p", 1)) + 1
+
+        result = await db.execute(self._rows_for_keys(keys.limit(limit + 1), columns, descending))
+        items = result.scalars().all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(
+                order_by, [getattr(last, column.key) for column in columns], page
+            )
+        return items, next_cursor, page
+
+    async def stream_columns(
+        self, db: AsyncSession, *, columns: Sequence[str], batch_size: int = 1000
+    ) -> AsyncIterator[Row]:
+        """
+        Stream every row of the table as plain column tuples, ordered by id.
+
+        Rows are fetched through a server-side cursor `batch_size` at a time and
+        never loaded as ORM objects, so memory stays flat regardless of table size.
+        """
+        query = (
+            select(*[getattr(self.model, column) for column in columns])
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream(query)
+        async for row in result:
+            yield row
+
+    async def count(self, db: AsyncSession, *, filters: Sequence[Any] = ()) -> int:
+        """Exact number of rows in the table, or of those matching `filters`"""
+        result = await db.execute(select(func.count()).select_from(self.model).where(*filters))
+        return result.scalar_one()
+
+    async def estimate_count(self, db: AsyncSession) -> int:
+        """
+        Approximate number of rows from the planner statistics in pg_class.
+
+        Costs a catalog lookup instead of a table scan. Falls back to an exact
+        count when the table has never been analyzed.
+        """
+        result = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": self.model.__tablename__},
+        )
+        estimate = result.scalar()
+        if estimate is None or estimate < 0:
+            return await self.count(db)
+        return estimate
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
@@ -55,22 +320,58 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
-    ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+    ) -> Optional[ModelType]:
+        """Update `db_obj`'s row; returns None if it was deleted in the meantime"""
+        return await self.update_by_id(db, id=db_obj.id, obj_in=obj_in)
+
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """
+        Update a row by id with a single UPDATE ... RETURNING statement.
+        Returns the updated object, or None if no row has that id.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        columns = self.model.__table__.columns.keys()
+        values = {field: value for field, value in update_data.items() if field in columns}
+        if not values:
+            return await self.get(db, id=id)
+
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        obj = result.scalars().first()
         await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        return obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        return await self.delete_by_id(db, id=id)
 
-    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
-        obj = await self.get(db, id=id)
-        await db.delete(obj)
+    async def delete_by_id(
+        self, db: AsyncSession, *, id: Any, criteria: Sequence[Any] = ()
+    ) -> Optional[ModelType]:
+        """
+        Delete a row by id with a single DELETE ... RETURNING statement.
+        Extra `criteria` must match too. Returns the deleted object, or None if
+        nothing matched.
+        """
+        result = await db.execute(
+            delete(self.model)
+            .where(self.model.id == id, *criteria)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        obj = result.scalars().first()
         await db.commit()
         return obj
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.token import RevokedToken
+from app.schemas.token import TokenPayload
+
+
+class CRUDRevokedToken(CRUDBase[RevokedToken, BaseModel, BaseModel]):
+    async def revoke(self, db: AsyncSession, *, tokens: List[TokenPayload]) -> List[str]:
+        """
+        Record tokens as revoked, in one statement. Returns the IDs that were newly
+        revoked; tokens that already were are left alone and not returned.
+        """
+        rows = [
+            {
+                "jti": token.jti,
+                "token_type": token.type,
+                "user_id": token.sub,
+                "expires_at": datetime.fromtimestamp(token.exp, tz=timezone.utc),
+            }
+            for token in tokens
+            if token.jti and token.exp is not None
+        ]
+        if not rows:
+            return []
+        stmt = (
+            pg_insert(self.model)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(self.model.jti)
+        )
+        result = await db.execute(stmt)
+        revoked = list(result.scalars().all())
+        await db.commit()
+        return revoked
+
+    async def is_revoked(self, db: AsyncSession, *, jti: str) -> bool:
+        result = await db.execute(select(exists().where(self.model.jti == jti)))
+        return bool(result.scalar())
+
+    async def get_active_jtis(self, db: AsyncSession) -> List[str]:
+        """IDs of revoked tokens that have not expired yet"""
+        result = await db.execute(
+            select(self.model.jti).where(self.model.expires_at > datetime.now(timezone.utc))
+        )
+        return list(result.scalars().all())
+
+    async def purge_expired(self, db: AsyncSession, *, before: Optional[datetime] = None) -> int:
+        """Delete rows for tokens that have expired, which can no longer be used anyway"""
+        before = before or datetime.now(timezone.utc)
+        result = await db.execute(delete(self.model).where(self.model.expires_at <= before))
+        await db.commit()
+        return result.rowcount
+
+
+revoked_token = CRUDRevokedToken(RevokedToken)
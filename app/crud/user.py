@@ -1,15 +1,98 @@
-from typing import Any, Dict, Optional, Union, Type
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union, Type
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import case, func, select, or_, tuple_, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.core.cache import principal_cache
+from app.core.principal_versions import principal_versions
+from app.core.response_cache import response_cache
+from app.core.security import (
+    dummy_verify_password_async,
+    get_password_hash_async,
+    verify_password_async,
+)
+from app.crud.base import CRUDBase, cursor_values, decode_cursor, encode_cursor
 from app.models.user import User, GeneralUser, FreshCartUser, UserRole
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
+
+# Columns kept in the principal cache: everything the User schema serializes
+# plus what authorization checks need (never the password hash)
+PRINCIPAL_FIELDS = ("id", "email", "username", "is_active", "role", "created_at", "updated_at")
+
+# Columns with a unique index, which writes rely on to reject duplicates
+UNIQUE_FIELDS = ("email", "username")
+
+# Columns matched by search(), each with a prefix index on lower(column) COLLATE "C"
+SEARCH_FIELDS = ("username", "email")
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally (with ESCAPE '\\')"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def unique_violation_field(exc: IntegrityError) -> Optional[str]:
+    """
+    Name of the unique column ("email" or "username") whose index rejected a write,
+    or None if the error was caused by something else
+    """
+    # asyncpg reports the violated index (e.g. ix_users_general_email) on the
+    # original driver exception; fall back to the "Key (column)=" detail
+    constraint = getattr(getattr(exc.orig, "__cause__", None), "constraint_name", None)
+    if constraint:
+        for field in UNIQUE_FIELDS:
+            if constraint.endswith(f"_{field}") or constraint.endswith(f"_{field}_key"):
+                return field
+    match = re.search(r"Key \((\w+)\)=", str(exc.orig))
+    if match and match.group(1) in UNIQUE_FIELDS:
+        return match.group(1)
+    return None
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def _principal_key(self, id: Any) -> str:
+        return f"{self.model.__tablename__}:{id}"
+
+    async def get_principal(self, db: AsyncSession, *, id: Any) -> Optional[User]:
+        """
+        Get the user behind an access token, served from the principal cache when possible.
+
+        Cache hits return a detached instance with the cached columns loaded, so it
+        can still be passed to update() and re-attached to a session. Only rows
+        read from the primary are cached, each under its current version, so a
+        write in any worker (which bumps the version) makes every worker miss.
+        """
+        key = self._principal_key(id)
+        version = await principal_versions.current(key)
+        snapshot = principal_cache.get((key, version)) if version is not None else None
+        if snapshot is not None:
+            user = self.model(**snapshot)
+            make_transient_to_detached(user)
+            return user
+
+        user = await self.get(db, id=id)
+        # Rows read from a replica may predate a role or is_active change, and
+        # caching them would keep that stale state alive for the whole TTL
+        if user is not None and version is not None and "replica" not in db.info:
+            principal_cache.set((key, version), {field: getattr(user, field) for field in PRINCIPAL_FIELDS})
+        return user
+
+    async def invalidate_principal(self, id: Any) -> None:
+        key = self._principal_key(id)
+        version = await principal_versions.current(key)
+        if version is not None:
+            principal_cache.invalidate((key, version))
+        await principal_versions.bump(key)
+
+    @property
+    def cache_namespace(self) -> str:
+        """Response cache namespace of this table's listings; writes here invalidate it"""
+        return self.model.__tablename__
+
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
         result = await db.execute(select(self.model).where(self.model.email == email))
         return result.scalars().first()
@@ -22,53 +105,212 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db_obj = self.model(
             email=obj_in.email,
             username=obj_in.username,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await get_password_hash_async(obj_in.password),
             is_active=True,
             role=obj_in.role or UserRole.USER
         )
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await response_cache.invalidate(self.cache_namespace)
         return db_obj
 
-    async def update(
-        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
-    ) -> User:
+    async def get_by_login(self, db: AsyncSession, *, identifier: str) -> Optional[User]:
+        """
+        Get a user by email or username in a single query.
+
+        An email match takes precedence over a username match, so a username that
+        looks like someone else's email can't shadow that account. Served by the
+        unique indexes on email and username (a BitmapOr of the two).
+        """
+        result = await db.execute(
+            select(self.model)
+            .where(or_(self.model.email == identifier, self.model.username == identifier))
+            .order_by(case((self.model.email == identifier, 0), else_=1))
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    def filter_criteria(self, filters: Optional[UserFilter]) -> List[Any]:
+        """
+        SQL criteria for the set fields of `filters`. role and is_active are served
+        by the (role, is_active, id) index, the created_at range by (created_at, id).
+        """
+        if filters is None:
+            return []
+        criteria = []
+        if filters.role is not None:
+            criteria.append(self.model.role == filters.role)
+        if filters.is_active is not None:
+            criteria.append(self.model.is_active == filters.is_active)
+        if filters.created_after is not None:
+            criteria.append(self.model.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            criteria.append(self.model.created_at < filters.created_before)
+        return criteria
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        query: str,
+        match: str = "prefix",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        max_candidates: int = 200,
+    ) -> Tuple[List[User], Optional[str], int, int]:
+        """
+        Search users by username or email, case-insensitively, best matches first.
+
+        Results are ranked exact match, then username prefix, then email prefix,
+        then (with match="contains") substring. Each kind of match contributes at
+        most `max_candidates` rows, read from an index in order, so the cost stays
+        flat as the table grows. Returns the page, the next cursor, the page number
+        and the number of candidates. Raises ValueError for an invalid cursor or limit.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        term = query.strip().lower()
+        prefix = escape_like(term) + "%"
+        lowered = {field: func.lower(getattr(self.model, field)).collate("C") for field in SEARCH_FIELDS}
+
+        branches = [
+            select(self.model.id)
+            .where(lowered[field].like(prefix, escape="\\"))
+            .order_by(lowered[field])
+            .limit(max_candidates)
+            for field in SEARCH_FIELDS
+        ]
+        if match == "contains":
+            # Served by the pg_trgm indexes where the extension is installed
+            substring = "%" + escape_like(term) + "%"
+            branches += [
+                select(self.model.id)
+                .where(func.lower(getattr(self.model, field)).like(substring, escape="\\"))
+                .order_by(self.model.id)
+                .limit(max_candidates)
+                for field in SEARCH_FIELDS
+            ]
+        candidates = union(*branches).cte("candidates")
+
+        rank = case(
+            (or_(*(lowered[field] == term for field in SEARCH_FIELDS)), 0),
+            (lowered["username"].like(prefix, escape="\\"), 1),
+            (lowered["email"].like(prefix, escape="\\"), 2),
+            else_=3,
+        )
+        total = select(func.count()).select_from(candidates).scalar_subquery()
+        stmt = (
+            select(self.model, rank, total)
+            .join(candidates, candidates.c.id == self.model.id)
+            .order_by(rank, self.model.id)
+            .limit(limit + 1)
+        )
+
+        ordering = f"search:{match}"
+        page = 1
+        if cursor:
+            payload = decode_cursor(cursor)
+            if payload.get("o") != ordering:
+                raise ValueError("Pagination cursor does not match the requested search")
+            stmt = stmt.where(tuple_(rank, self.model.id) > tuple_(*cursor_values(payload, [int, int])))
+            page = int(payload.get("p", 1)) + 1
+
+        rows = (await db.execute(stmt)).all()
+        total_candidates = rows[0][2] if rows else 0
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_user, last_rank, _ = rows[-1]
+            next_cursor = encode_cursor(ordering, [last_rank, last_user.id], page)
+        return [row[0] for row in rows], next_cursor, page, total_candidates
+
+    async def get_taken_identifiers(
+        self, db: AsyncSession, *, emails: List[str], usernames: List[str]
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Find which of the given emails and usernames are already registered, in one query
+        """
+        result = await db.execute(
+            select(self.model.email, self.model.username).where(
+                or_(self.model.email.in_(emails), self.model.username.in_(usernames))
+            )
+        )
+        taken_emails, taken_usernames = set(), set()
+        for email, username in result.all():
+            taken_emails.add(email)
+            taken_usernames.add(username)
+        return taken_emails, taken_usernames
+
+    async def create_multi(
+        self, db: AsyncSession, *, objs_in: List[UserCreate], hashed_passwords: List[str]
+    ) -> List[User]:
+        """
+        Insert many users with a multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+        Rows that collide with an existing email or username are skipped, so only
+        the users actually created are returned.
+        """
+        rows = [
+            {
+                "email": obj_in.email,
+                "username": obj_in.username,
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "role": obj_in.role or UserRole.USER,
+            }
+            for obj_in, hashed_password in zip(objs_in, hashed_passwords)
+        ]
+        result = await db.scalars(
+            pg_insert(self.model).values(rows).on_conflict_do_nothing().returning(self.model)
+        )
+        users = result.all()
+        await db.commit()
+        if users:
+            await response_cache.invalidate(self.cache_namespace)
+        return users
+
+    async def update_by_id(
+        self, db: AsyncSession, *, id: Any, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> Optional[User]:
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = dict(obj_in)
         else:
             update_data = obj_in.dict(exclude_unset=True)
         if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash_async(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        user = await super().update_by_id(db, id=id, obj_in=update_data)
+        await self.invalidate_principal(id)
+        await response_cache.invalidate(self.cache_namespace)
+        return user
 
-    async def delete(self, db: AsyncSession, *, id: int) -> Optional[User]:
+    async def delete(
+        self, db: AsyncSession, *, id: int, criteria: Sequence[Any] = ()
+    ) -> Optional[User]:
         """
-        Delete a user by id
+        Delete a user by id, optionally only if `criteria` also match
         """
-        user = await self.get(db, id=id)
+        user = await self.delete_by_id(db, id=id, criteria=criteria)
         if user:
-            await db.delete(user)
-            await db.commit()
+            await self.invalidate_principal(id)
+            await response_cache.invalidate(self.cache_namespace)
         return user
 
     async def authenticate(
         self, db: AsyncSession, *, email: str, password: str
     ) -> Optional[User]:
-        # First try email lookup
-        user = await self.get_by_email(db, email=email)
+        # Look up by email or username in one round trip
+        user = await self.get_by_login(db, identifier=email)
         
-        # If not found by email, try username lookup
-        if not user:
-            user = await self.get_by_username(db, username=email)
-            
-        # If not found by either method
+        # Unknown users still pay for a verify so response times don't reveal them
         if not user:
+            await dummy_verify_password_async(password)
             return None
             
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
             
         return user
@@ -1,23 +1,273 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
-import os
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 from urllib.parse import quote_plus
 
-load_dotenv()
+from app.core.config import settings
+from app.core.metrics import CallbackCounter, CallbackGauge, db_queries_total, db_query_duration_seconds
 
-# Get connection parameters from environment variables
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
+logger = logging.getLogger(__name__)
 
-# Build connection URL with proper URL encoding for special characters
-DB_PASS_ENCODED = quote_plus(DB_PASS)
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS_ENCODED}@{DB_HOST}/{DB_NAME}"
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+def get_database_url() -> str:
+    """Connection URL built from the DB_* settings, with the password URL-encoded"""
+    return (
+        f"postgresql+asyncpg://{settings.DB_USER}:{quote_plus(settings.DB_PASS)}"
+        f"@{settings.DB_HOST}/{settings.DB_NAME}"
+    )
+
+
+class PoolWaitStats:
+    """Time spent waiting for a pooled connection, across all checkouts"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if timed_out:
+            self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "total_seconds": round(self.total_seconds, 6),
+            "avg_seconds": round(self.total_seconds / self.checkouts, 6) if self.checkouts else 0.0,
+            "max_seconds": round(self.max_seconds, 6),
+            "timeouts": self.timeouts,
+        }
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            pool_wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+def _record_query_start(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _record_query_end(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+    db_queries_total.inc(operation)
+    db_query_duration_seconds.observe(elapsed, operation)
+
+
+def _create_engine(url: str, poolclass=AsyncAdaptedQueuePool, **kwargs: Any) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        **kwargs,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", _record_query_start)
+    event.listen(engine.sync_engine, "after_cursor_execute", _record_query_end)
+    return engine
+
+
+# Created on first use rather than at import, so importing the app (CLI commands,
+# alembic, a gunicorn master preloading the app) never builds a pool
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    """The application's (primary) engine, created on first call"""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(get_database_url(), poolclass=InstrumentedAsyncPool)
+    return _engine
+
+
+def get_sessionmaker() -> sessionmaker:
+    """Session factory bound to the application's engine, created on first call"""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = sessionmaker(get_engine(), expire_on_commit=False, class_=AsyncSession)
+    return _sessionmaker
+
+
+def async_session() -> AsyncSession:
+    """Open a new session, for code that runs outside a request"""
+    return get_sessionmaker()()
+
+
+class Replica:
+    """A read replica whose engine is created the first time it is used"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.label = make_url(url).render_as_string(hide_password=True)
+        self.engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[sessionmaker] = None
+        self.down_until = 0.0
+        self.failures = 0
+
+    def session(self) -> AsyncSession:
+        if self._sessionmaker is None:
+            self.engine = _create_engine(
+                self.url, connect_args={"timeout": settings.DB_REPLICA_CONNECT_TIMEOUT}
+            )
+            self._sessionmaker = sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
+        return self._sessionmaker()
+
+    def checked_out(self) -> int:
+        return self.engine.pool.checkedout() if self.engine is not None else 0
+
+    async def dispose(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+        self.engine = None
+        self._sessionmaker = None
+
+
+class ReplicaRouter:
+    """
+    Picks a read replica per session, round-robin or by fewest checked-out
+    connections. A replica that fails to connect is skipped for `retry_seconds`,
+    and reads go to the primary while no replica is available.
+    """
+
+    def __init__(self, urls: List[str], selection: str, retry_seconds: float):
+        if selection not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica selection: {selection}")
+        self.replicas = [Replica(url) for url in urls]
+        self.selection = selection
+        self.retry_seconds = retry_seconds
+        self._next = 0
+
+    def choose(self) -> Optional[Replica]:
+        now = time.monotonic()
+        available = [replica for replica in self.replicas if replica.down_until <= now]
+        if not available:
+            return None
+        if self.selection == "least_connections":
+            return min(available, key=lambda replica: replica.checked_out())
+        replica = available[self._next % len(available)]
+        self._next += 1
+        return replica
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        replica.down_until = time.monotonic() + self.retry_seconds
+        replica.failures += 1
+        logger.warning(
+            f"Read replica {replica.label} failed ({error!r}), "
+            f"using other replicas or the primary for {self.retry_seconds}s"
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.label,
+                "available": replica.down_until <= now,
+                "checked_out": replica.checked_out(),
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        ]
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DB_REPLICA_URLS.split(",") if url.strip()],
+    selection=settings.DB_REPLICA_SELECTION,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated
+    return isinstance(exc, (OSError, asyncio.TimeoutError))
+
+
+@asynccontextmanager
+async def read_session(
+    prefer_primary: bool = False, primary: Optional[AsyncSession] = None
+) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only work, on a replica when one is configured and available.
+
+    The replica's connection is checked out (and pinged, with DB_POOL_PRE_PING)
+    before the session is handed over. A replica that can't be reached is marked
+    down and the next one, or else the primary, is used instead, so the caller
+    never sees the failure. Reads that go to the primary use `primary` when given
+    (e.g. the request's own session, so a request never holds two primary
+    connections), else a new session.
+    """
+    replica = None if prefer_primary else replica_router.choose()
+    while replica is not None:
+        session = replica.session()
+        session.info["replica"] = replica.label
+        try:
+            await session.connection()
+        except Exception as e:
+            await session.close()
+            if not _is_connection_error(e):
+                raise
+            replica_router.mark_down(replica, e)
+            replica = replica_router.choose()
+            continue
+
+        try:
+            yield session
+        except Exception as e:
+            # The connection can still drop mid-request; later sessions skip the replica
+            if _is_connection_error(e):
+                replica_router.mark_down(replica, e)
+            raise
+        finally:
+            await session.close()
+        return
+
+    if primary is not None:
+        yield primary
+        return
+    async with async_session() as session:
+        yield session
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections and drop the engines; the next use creates new ones"""
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _sessionmaker = None
+    for replica in replica_router.replicas:
+        await replica.dispose()
+
 
 Base = declarative_base()
 
@@ -28,3 +278,78 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def warm_up_pool(connections: int) -> int:
+    """
+    Open up to `connections` pooled connections and run a warm-up query on each,
+    so the first requests after startup don't pay for connection setup.
+    Returns the number of connections warmed.
+    """
+    connections = min(connections, settings.DB_POOL_SIZE)
+    if connections <= 0:
+        return 0
+
+    async def _open():
+        conn = await get_engine().connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    results = await asyncio.gather(*(_open() for _ in range(connections)), return_exceptions=True)
+    warmed = 0
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Connection pool warm-up failed: {result}")
+            continue
+        await result.close()
+        warmed += 1
+    return warmed
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Current usage of the connection pool"""
+    pool = get_engine().pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "wait": pool_wait_stats.stats(),
+    }
+
+
+def _pool_connections():
+    # Scraping metrics shouldn't be what creates the engine
+    if _engine is None:
+        return []
+    stats = get_pool_stats()
+    return [((state,), stats[state]) for state in ("checked_out", "idle", "overflow")]
+
+
+CallbackGauge(
+    "db_pool_connections",
+    "Database pool connections by state",
+    _pool_connections,
+    ("state",),
+)
+CallbackGauge(
+    "db_pool_size",
+    "Configured database pool size",
+    lambda: [((), settings.DB_POOL_SIZE)],
+)
+CallbackCounter(
+    "db_pool_checkout_wait_seconds_total",
+    "Total time spent waiting for a pooled connection",
+    lambda: [((), pool_wait_stats.total_seconds)],
+)
+CallbackCounter(
+    "db_pool_checkouts_total",
+    "Connections checked out of the pool",
+    lambda: [((), pool_wait_stats.checkouts)],
+)
+CallbackCounter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that failed waiting for a connection",
+    lambda: [((), pool_wait_stats.timeouts)],
+)
@@ -2,11 +2,12 @@ import asyncio
 import logging
 from typing import Optional
 
-from app.database import Base, engine, get_db
+from app.database import Base, get_engine, get_db
 from app.core.config import settings
 from app.crud.user import general_user as general_user_crud, freshcart_user as freshcart_user_crud
 from app.schemas.user import UserCreate
 from app.models.user import UserRole
+import app.models  # noqa: F401 - registers every table for create_all
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,7 +48,7 @@ async def init_db() -> None:
     """Initialize database, create tables, and create users with different roles for both frontends"""
     try:
         # Create tables if they don't exist
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             logger.info("Creating tables if they don't exist...")
             # This will not recreate tables that already exist
             await conn.run_sync(Base.metadata.create_all)
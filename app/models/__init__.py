@@ -1,3 +1,4 @@
 from app.models.user import User
+from app.models.token import RevokedToken
 
 # Import all models here to make them discoverable by Alembic
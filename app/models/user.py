@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Index
+from sqlalchemy.orm import declared_attr
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
@@ -22,6 +23,28 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    @declared_attr
+    def __table_args__(cls):
+        table = cls.__tablename__
+        # Case-insensitive prefix search on each table. Byte-wise ("C") ordering lets
+        # the index serve both lower(column) LIKE 'abc%' and ORDER BY lower(column).
+        # The pg_trgm indexes for substring search are left to the migration, which
+        # creates them only where the extension is available
+        search_indexes = tuple(
+            Index(
+                f"ix_{table}_{column}_prefix",
+                func.lower(getattr(cls, column)).collate("C"),
+            )
+            for column in ("email", "username")
+        )
+        # Filtered listings: both end in id, so a filtered page of ids in key order
+        # is read from the index alone
+        filter_indexes = (
+            Index(f"ix_{table}_role_is_active_id", cls.role, cls.is_active, cls.id),
+            Index(f"ix_{table}_created_at_id", cls.created_at, cls.id),
+        )
+        return search_indexes + filter_indexes
+
 
 class GeneralUser(User):
     __tablename__ = "users_general"
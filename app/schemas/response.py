@@ -1,3 +1,4 @@
+from enum import Enum
 from typing import Generic, TypeVar, Optional, Any, Dict, List
 from pydantic import BaseModel
 
@@ -21,3 +22,14 @@ class PaginatedResponseModel(ResponseModel[List[T]]):
     page: int
     size: int
     pages: int
+    next_cursor: Optional[str] = None
+
+
+class PaginationMode(str, Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
+
+
+class TotalMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
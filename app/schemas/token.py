@@ -5,7 +5,20 @@ from typing import Optional
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+    # "access" or "refresh"; tokens issued before refresh tokens existed carry no type
+    type: str = "access"
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
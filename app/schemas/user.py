@@ -43,3 +43,19 @@ class User(UserInDBBase):
 class UserInDB(UserInDBBase):
     """User schema with password hash - for internal use only"""
     hashed_password: str
+
+
+class UserFilter(BaseModel):
+    """Server-side filters for listing users; unset fields don't filter"""
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class UserBulkResult(BaseModel):
+    """Outcome of one entry of a bulk create request"""
+    index: int
+    success: bool
+    user: Optional[User] = None
+    error: Optional[str] = None
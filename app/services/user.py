@@ -1,8 +1,9 @@
 from typing import List, Optional, Any
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.user import general_user as user_crud
+from app.crud.user import general_user as user_crud, unique_violation_field
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -25,48 +26,45 @@ class UserService:
         return await user_crud.get_multi(db, skip=skip, limit=limit)
 
     @staticmethod
-    async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-        # Check if email is already registered
-        existing_user = await user_crud.get_by_email(db, email=user_in.email)
-        if existing_user:
+    def _raise_if_duplicate(exc: IntegrityError) -> None:
+        # Translate a unique index violation into the matching 400
+        field = unique_violation_field(exc)
+        if field == "email":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        
-        # Check if username is already registered
-        existing_username = await user_crud.get_by_username(db, username=user_in.username)
-        if existing_username:
+        if field == "username":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered"
             )
-        
-        return await user_crud.create(db, obj_in=user_in)
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
+        # Duplicate emails and usernames are rejected by the unique indexes
+        try:
+            return await user_crud.create(db, obj_in=user_in)
+        except IntegrityError as e:
+            UserService._raise_if_duplicate(e)
+            raise
 
     @staticmethod
     async def update_user(
         db: AsyncSession, current_user: User, user_in: UserUpdate
     ) -> User:
-        # Check if email update is requested and if it's available
-        if user_in.email and user_in.email != current_user.email:
-            existing_user = await user_crud.get_by_email(db, email=user_in.email)
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email already registered"
-                )
-        
-        # Check if username update is requested and if it's available
-        if user_in.username and user_in.username != current_user.username:
-            existing_user = await user_crud.get_by_username(db, username=user_in.username)
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already registered"
-                )
-        
-        return await user_crud.update(db, db_obj=current_user, obj_in=user_in)
+        # Email/username conflicts are rejected by the unique indexes
+        try:
+            user = await user_crud.update(db, db_obj=current_user, obj_in=user_in)
+        except IntegrityError as e:
+            UserService._raise_if_duplicate(e)
+            raise
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return user
 
 
 user_service = UserService()
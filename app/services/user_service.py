@@ -1,20 +1,185 @@
-from typing import List, Optional
+import csv
+import io
+import math
+from typing import AsyncIterator, Dict, List, Optional
 
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.user import general_user as user
+from app.core.config import settings
+from app.core.security import get_password_hashes_async
+from app.crud.user import general_user as user, unique_violation_field
+from app.database import read_session
 from app.models.user import User, UserRole
-from app.schemas.user import UserCreate, UserUpdate, User as UserSchema
+from app.schemas.response import PaginatedResponseModel, TotalMode
+from app.schemas.user import UserCreate, UserFilter, UserUpdate, UserBulkResult, User as UserSchema
 
+# Response cache namespace of user listings, invalidated by writes through `user`
+USERS_CACHE_NAMESPACE = user.cache_namespace
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
-    users = await user.get_multi(db, skip=skip, limit=limit)
+
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[UserFilter] = None,
+    order_by: str = "id",
+) -> List[User]:
+    try:
+        users = await user.get_multi(
+            db, skip=skip, limit=limit, filters=user.filter_criteria(filters), order_by=order_by
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     return users
 
 
+async def get_users_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    order_by: str = "id",
+    total_mode: TotalMode = TotalMode.ESTIMATE,
+    filters: Optional[UserFilter] = None,
+) -> PaginatedResponseModel:
+    """
+    Get a page of users using keyset pagination.
+
+    `total` is an exact count or the planner's row estimate depending on `total_mode`.
+    The estimate covers the whole table, so filtered pages always count exactly.
+    """
+    criteria = user.filter_criteria(filters)
+    try:
+        users, next_cursor, page = await user.get_multi_keyset(
+            db, cursor=cursor, limit=limit, order_by=order_by, filters=criteria
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if total_mode == TotalMode.EXACT or criteria:
+        total = await user.count(db, filters=criteria)
+    else:
+        total = await user.estimate_count(db)
+
+    return PaginatedResponseModel(
+        success=True,
+        message="Users retrieved successfully",
+        data=users,
+        total=total,
+        page=page,
+        size=limit,
+        pages=math.ceil(total / limit) if limit else 0,
+        next_cursor=next_cursor,
+    )
+
+
+async def search_users(
+    db: AsyncSession,
+    query: str,
+    match: str = "prefix",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> PaginatedResponseModel:
+    """
+    Search users by username or email prefix (or substring), best matches first.
+
+    `total` is the number of matches considered, which is capped by
+    USER_SEARCH_MAX_CANDIDATES per kind of match.
+    """
+    query = query.strip()
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must not be blank"
+        )
+    # Trigram indexes can't narrow down shorter substrings
+    if match == "contains" and len(query) < 3:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Substring search needs at least 3 characters"
+        )
+
+    try:
+        users, next_cursor, page, total = await user.search(
+            db,
+            query=query,
+            match=match,
+            limit=limit,
+            cursor=cursor,
+            max_candidates=settings.USER_SEARCH_MAX_CANDIDATES,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return PaginatedResponseModel(
+        success=True,
+        message="Users retrieved successfully",
+        data=users,
+        total=total,
+        page=page,
+        size=limit,
+        pages=math.ceil(total / limit) if limit else 0,
+        next_cursor=next_cursor,
+    )
+
+
+# Columns included in user exports, in CSV column order
+EXPORT_FIELDS = ("id", "email", "username", "is_active", "role", "created_at", "updated_at")
+# Rows serialized before a chunk is handed to the client
+EXPORT_CHUNK_ROWS = 500
+
+
+async def export_users(export_format: str) -> AsyncIterator[str]:
+    """
+    Serialize every user as NDJSON or CSV, row by row.
+
+    Uses its own session (on a read replica when configured) because the stream
+    outlives the request's dependencies.
+    Chunks are yielded as soon as they fill up, so the client starts receiving
+    data while the query is still running.
+    """
+    async with read_session() as session:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(EXPORT_FIELDS)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        rows = 0
+        async for row in user.stream_columns(session, columns=EXPORT_FIELDS):
+            user_out = UserSchema.model_validate(row, from_attributes=True)
+            if export_format == "csv":
+                values = user_out.model_dump(mode="json")
+                writer.writerow([values[field] for field in EXPORT_FIELDS])
+            else:
+                buffer.write(user_out.model_dump_json())
+                buffer.write("\n")
+
+            rows += 1
+            if rows % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
-    user_obj = await user.get(db, id=user_id)
+    # Through the session's loader, so concurrent lookups share one query
+    user_obj = await user.loader(db).load(user_id)
     if not user_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -23,50 +188,130 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     return user_obj
 
 
+async def get_users_by_ids(db: AsyncSession, user_ids: List[int]) -> List[Optional[User]]:
+    """
+    Users for `user_ids` in the requested order, None for ids that don't exist.
+    All of them are fetched with one query.
+    """
+    if not user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one user id is required"
+        )
+    if len(user_ids) > settings.USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USER_BATCH_MAX_IDS} user ids can be requested at once"
+        )
+    return await user.loader(db).load_many(user_ids)
+
+
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return await user.get_by_email(db, email=email)
 
 
-async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
-    # Check if user with email already exists
-    user_exists = await user.get_by_email(db, email=user_create.email)
-    if user_exists:
+def _raise_if_duplicate(exc: IntegrityError) -> None:
+    """Translate a unique index violation on email or username into a 400"""
+    field = unique_violation_field(exc)
+    if field == "email":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A user with this email already exists"
         )
-    
-    # Check if user with username already exists
-    username_exists = await user.get_by_username(db, username=user_create.username)
-    if username_exists:
+    if field == "username":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A user with this username already exists"
         )
-    
-    return await user.create(db, obj_in=user_create)
+
+
+async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
+    # Duplicate emails and usernames are rejected by the unique indexes, which
+    # also holds under concurrent signups
+    try:
+        return await user.create(db, obj_in=user_create)
+    except IntegrityError as e:
+        _raise_if_duplicate(e)
+        raise
+
+
+async def bulk_create_users(db: AsyncSession, users_in: List[UserCreate]) -> List[UserBulkResult]:
+    """
+    Create many users at once, reporting success or failure for each entry:
+    - Emails and usernames already registered are found with a single query
+    - When the batch repeats an email or username, the first entry wins
+    - Passwords are hashed in parallel and all users are inserted in one statement
+    """
+    taken_emails, taken_usernames = await user.get_taken_identifiers(
+        db,
+        emails=[user_in.email for user_in in users_in],
+        usernames=[user_in.username for user_in in users_in],
+    )
+    # End the lookup's transaction so the session doesn't sit idle in it, holding
+    # a pooled connection, while the passwords are hashed. The check is advisory
+    # anyway: ON CONFLICT DO NOTHING in create_multi is what rejects duplicates
+    await db.commit()
+
+    results: Dict[int, UserBulkResult] = {}
+    candidates = []
+    seen_emails, seen_usernames = set(), set()
+    for index, user_in in enumerate(users_in):
+        if user_in.email in taken_emails:
+            error = "A user with this email already exists"
+        elif user_in.username in taken_usernames:
+            error = "A user with this username already exists"
+        elif user_in.email in seen_emails:
+            error = "Email appears more than once in this batch"
+        elif user_in.username in seen_usernames:
+            error = "Username appears more than once in this batch"
+        else:
+            error = None
+            candidates.append((index, user_in))
+        seen_emails.add(user_in.email)
+        seen_usernames.add(user_in.username)
+        if error:
+            results[index] = UserBulkResult(index=index, success=False, error=error)
+
+    if candidates:
+        hashed_passwords = await get_password_hashes_async(
+            [user_in.password for _, user_in in candidates]
+        )
+        created = await user.create_multi(
+            db,
+            objs_in=[user_in for _, user_in in candidates],
+            hashed_passwords=hashed_passwords,
+        )
+        created_by_email = {created_user.email: created_user for created_user in created}
+        for index, user_in in candidates:
+            created_user = created_by_email.get(user_in.email)
+            if created_user is None:
+                # Lost a race with a concurrent write of the same email or username
+                results[index] = UserBulkResult(
+                    index=index,
+                    success=False,
+                    error="A user with this email or username already exists",
+                )
+            else:
+                results[index] = UserBulkResult(
+                    index=index, success=True, user=UserSchema.model_validate(created_user)
+                )
+
+    return [results[index] for index in range(len(users_in))]
 
 
 async def update_user(db: AsyncSession, user_obj: User, user_update: UserUpdate) -> User:
-    # If updating email, check if it conflicts with existing users
-    if user_update.email and user_update.email != user_obj.email:
-        existing_user = await user.get_by_email(db, email=user_update.email)
-        if existing_user and existing_user.id != user_obj.id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="A user with this email already exists"
-            )
-    
-    # If updating username, check if it conflicts with existing users
-    if user_update.username and user_update.username != user_obj.username:
-        existing_username = await user.get_by_username(db, username=user_update.username)
-        if existing_username and existing_username.id != user_obj.id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="A user with this username already exists"
-            )
-    
-    return await user.update(db, db_obj=user_obj, obj_in=user_update)
+    # Email/username conflicts are rejected by the unique indexes
+    try:
+        updated_user = await user.update_by_id(db, id=user_obj.id, obj_in=user_update)
+    except IntegrityError as e:
+        _raise_if_duplicate(e)
+        raise
+    if not updated_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_obj.id} not found"
+        )
+    return updated_user
 
 
 async def delete_user(db: AsyncSession, user_id: int, current_user: User) -> User:
@@ -77,11 +322,8 @@ async def delete_user(db: AsyncSession, user_id: int, current_user: User) -> Use
     - Regular users cannot delete any user
     - Users cannot delete themselves
     """
-    # Get the user to delete
-    user_to_delete = await get_user_by_id(db, user_id)
-    
     # Prevent self-deletion
-    if user_to_delete.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete your own account"
@@ -90,14 +332,10 @@ async def delete_user(db: AsyncSession, user_id: int, current_user: User) -> Use
     # Check permissions based on role
     if current_user.role == UserRole.ADMIN:
         # Admins can delete anyone
-        pass
+        criteria = ()
     elif current_user.role == UserRole.MANAGER:
         # Managers can delete regular users but not admins
-        if user_to_delete.role == UserRole.ADMIN:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Managers cannot delete admin users"
-            )
+        criteria = (user.model.role != UserRole.ADMIN,)
     else:
         # Regular users cannot delete anyone
         raise HTTPException(
@@ -105,9 +343,15 @@ async def delete_user(db: AsyncSession, user_id: int, current_user: User) -> Use
             detail="Insufficient permissions to delete users"
         )
     
-    # Proceed with deletion
-    deleted_user = await user.delete(db, id=user_id)
+    # Delete in one statement; the role restriction is part of the DELETE
+    deleted_user = await user.delete(db, id=user_id, criteria=criteria)
     if not deleted_user:
+        # Nothing matched: tell a manager targeting an admin apart from a missing user
+        if criteria and await user.get(db, id=user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Managers cannot delete admin users"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with ID {user_id} not found"
@@ -123,11 +367,8 @@ async def update_user_role(db: AsyncSession, user_id: int, new_role: UserRole, c
     - Users cannot change their own role
     - Only admins can create other admins
     """
-    # Get the user to update
-    user_to_update = await get_user_by_id(db, user_id)
-    
     # Prevent self-role change
-    if user_to_update.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot change your own role"
@@ -140,5 +381,12 @@ async def update_user_role(db: AsyncSession, user_id: int, new_role: UserRole, c
             detail="Only administrators can change user roles"
         )
     
-    # Update the role
-    return await user.update(db, db_obj=user_to_update, obj_in={"role": new_role})
+    # Update the role in one UPDATE ... RETURNING (CRUDUser also drops the user's
+    # cached principal, so the new role applies to their very next request)
+    updated_user = await user.update_by_id(db, id=user_id, obj_in={"role": new_role})
+    if not updated_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} not found"
+        )
+    return updated_user
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark: single-user creation vs POST /users/bulk.
+
+Creates users through user_service.create_user one at a time (what N calls to
+POST /users do) and through user_service.bulk_create_users in batches, then
+reports users per second. Runs against the database configured in .env and
+removes the users it created.
+
+    python benchmarks/bench_bulk_create.py [--users 500] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete
+
+from app.database import async_session, dispose_engine
+from app.models.user import GeneralUser
+from app.schemas.user import UserCreate
+from app.services import user_service
+
+
+def make_users(prefix: str, count: int):
+    return [
+        UserCreate(
+            email=f"{prefix}-{i}@bench.example.com",
+            username=f"{prefix}-{i}",
+            password=f"password-{i}",
+        )
+        for i in range(count)
+    ]
+
+
+async def run_single(users) -> float:
+    async with async_session() as db:
+        start = time.perf_counter()
+        for user_in in users:
+            await user_service.create_user(db, user_in)
+        return time.perf_counter() - start
+
+
+async def run_bulk(users, batch_size: int) -> float:
+    async with async_session() as db:
+        start = time.perf_counter()
+        for offset in range(0, len(users), batch_size):
+            results = await user_service.bulk_create_users(db, users[offset:offset + batch_size])
+            assert all(result.success for result in results), "bulk create reported failures"
+        return time.perf_counter() - start
+
+
+async def cleanup(prefix: str) -> None:
+    async with async_session() as db:
+        await db.execute(delete(GeneralUser).where(GeneralUser.username.like(f"{prefix}-%")))
+        await db.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    try:
+        single = await run_single(make_users(f"{prefix}-s", args.users))
+        bulk = await run_bulk(make_users(f"{prefix}-b", args.users), args.batch_size)
+    finally:
+        await cleanup(prefix)
+        await dispose_engine()
+
+    print(f"users created per path:  {args.users}")
+    print(f"single create:           {args.users / single:10.1f} users/s ({single:.2f}s)")
+    print(f"bulk create (batch {args.batch_size}): {args.users / bulk:10.1f} users/s ({bulk:.2f}s)")
+    print(f"speedup:                 {single / bulk:10.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
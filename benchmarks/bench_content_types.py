@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Payload size and encode/decode time of user pages as JSON, MessagePack and NDJSON.
+
+Encodes a paginated user response (PaginatedResponseModel, as GET /users with
+pagination=cursor returns) through the same path the API uses for each media
+type, decodes it the way a client would, and reports the body size and the
+mean encode and decode times for page sizes 1, 100 and 1000. No server or
+database is needed.
+
+    python benchmarks/bench_content_types.py [--iterations 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, List
+
+# Settings require database variables even though nothing connects here
+for name in ("DB_USER", "DB_PASS", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(name, "bench")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import msgpack
+import orjson
+
+from app.api.serialization import dump, user_page_adapter
+from app.core.negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+from app.models.user import GeneralUser, UserRole
+from app.schemas.response import PaginatedResponseModel
+
+PAGE_SIZES = (1, 100, 1000)
+
+DECODERS = {
+    JSON_MEDIA_TYPE: orjson.loads,
+    MSGPACK_MEDIA_TYPE: msgpack.unpackb,
+    NDJSON_MEDIA_TYPE: lambda body: [orjson.loads(line) for line in body.splitlines()],
+}
+
+
+def make_page(count: int) -> PaginatedResponseModel:
+    now = datetime.now(timezone.utc)
+    users: List[GeneralUser] = [
+        GeneralUser(
+            id=i,
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            hashed_password="x",
+            is_active=True,
+            role=UserRole.USER,
+            created_at=now,
+            updated_at=None if i % 2 else now,
+        )
+        for i in range(count)
+    ]
+    return PaginatedResponseModel(
+        success=True,
+        message="Users retrieved successfully",
+        data=users,
+        total=count * 10,
+        page=1,
+        size=count,
+        pages=10,
+        next_cursor="eyJvIjoiaWQiLCJrIjpbMTAwXSwicCI6MX0",
+    )
+
+
+def mean_us(fn: Callable[[], object], iterations: int) -> float:
+    for _ in range(min(20, iterations)):  # warm-up
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.fmean(timings) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'page size':>9} {'media type':<22} {'bytes':>9} {'vs json':>8} "
+        f"{'encode us':>10} {'decode us':>10}"
+    )
+    for size in PAGE_SIZES:
+        page = make_page(size)
+        json_size = None
+        for media_type, decode in DECODERS.items():
+            body = dump(user_page_adapter, page, media_type)
+            json_size = json_size or len(body)
+            encode_us = mean_us(lambda: dump(user_page_adapter, page, media_type), args.iterations)
+            decode_us = mean_us(lambda: decode(body), args.iterations)
+            print(
+                f"{size:>9} {media_type:<22} {len(body):>9} {len(body) / json_size:7.2f}x "
+                f"{encode_us:10.1f} {decode_us:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Latency benchmark for the error handling middleware.
+
+Serves `/` and `/api/health/` through the same middleware stack as main.py,
+once with the previous BaseHTTPMiddleware-based error handler and once with
+the pure ASGI ErrorHandlerMiddleware, and reports per-request latency.
+Requests are sent in-process through httpx's ASGI transport, so no server or
+database is needed.
+
+    python benchmarks/bench_middleware.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Callable
+
+# Settings require database variables even though nothing connects here
+for name in ("DB_USER", "DB_PASS", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(name, "bench")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+from fastapi import FastAPI, Request, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.endpoints import health
+from app.core.middleware.error_handler import ErrorHandlerMiddleware
+from main import root
+
+
+class LegacyErrorHandlerMiddleware(BaseHTTPMiddleware):
+    """The error handler as it was before the pure ASGI rewrite"""
+
+    async def dispatch(self, request: Request, call_next: Callable):
+        try:
+            return await call_next(request)
+        except SQLAlchemyError:
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": "Database error occurred", "type": "database_error"}
+            )
+        except Exception:
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": "Internal server error", "type": "server_error"}
+            )
+
+
+def build_app(error_middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(error_middleware)
+    app.get("/")(root)
+    app.include_router(health.router, prefix="/api/health")
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # warm-up
+            await client.get(path)
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+    latencies.sort()
+    return {
+        "mean": statistics.fmean(latencies) * 1e6,
+        "p50": latencies[len(latencies) // 2] * 1e6,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    variants = {
+        "BaseHTTPMiddleware": build_app(LegacyErrorHandlerMiddleware),
+        "pure ASGI": build_app(ErrorHandlerMiddleware),
+    }
+    print(f"{'path':<14} {'middleware':<20} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    for path in ("/", "/api/health/"):
+        for label, app in variants.items():
+            result = await measure(app, path, args.requests)
+            print(f"{path:<14} {label:<20} {result['mean']:9.1f} {result['p50']:9.1f} {result['p99']:9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
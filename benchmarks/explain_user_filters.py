@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Check that filtered and sorted user listings are served by index-only scans.
+
+Builds the queries GET /users runs for a set of filter/sort combinations, runs
+EXPLAIN ANALYZE on each against the database configured in .env and reports the
+scan the planner chose for the page of ids. Exits with status 1 if any of them
+is not an index-only scan on the expected composite index.
+
+Index-only scans rely on the visibility map, so on a freshly loaded table run
+with --vacuum (VACUUM ANALYZE first) or after autovacuum has caught up.
+
+    python benchmarks/explain_user_filters.py [--vacuum] [--limit 50] [--verbose]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.crud.user import general_user as user
+from app.database import dispose_engine, get_engine
+from app.models.user import UserRole
+from app.schemas.user import UserFilter
+
+TABLE = user.model.__tablename__
+RECENT = datetime.now(timezone.utc) - timedelta(days=30)
+
+# (description, filters, order_by, index expected to serve the page of ids)
+SCENARIOS = [
+    ("role", UserFilter(role=UserRole.MANAGER), "id", f"ix_{TABLE}_role_is_active_id"),
+    (
+        "role + is_active",
+        UserFilter(role=UserRole.USER, is_active=True),
+        "id",
+        f"ix_{TABLE}_role_is_active_id",
+    ),
+    (
+        "role + is_active, newest id first",
+        UserFilter(role=UserRole.ADMIN, is_active=True),
+        "-id",
+        f"ix_{TABLE}_role_is_active_id",
+    ),
+    ("created_at range", UserFilter(created_after=RECENT), "created_at", f"ix_{TABLE}_created_at_id"),
+    ("newest first", UserFilter(), "-created_at", f"ix_{TABLE}_created_at_id"),
+]
+
+
+def compile_sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def explain(conn, sql: str) -> str:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))
+    return "\n".join(row[0] for row in result)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM ANALYZE the table first")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--verbose", action="store_true", help="print each full plan")
+    args = parser.parse_args()
+
+    failures = 0
+    try:
+        engine = get_engine()
+        if args.vacuum:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text(f"VACUUM ANALYZE {TABLE}"))
+
+        async with engine.connect() as conn:
+            for description, filters, order_by, index in SCENARIOS:
+                keys, columns, descending = user._ordered_keys(order_by, user.filter_criteria(filters))
+                page = user._rows_for_keys(keys.limit(args.limit), columns, descending)
+                plan = await explain(conn, compile_sql(page))
+
+                expected = f"Index Only Scan using {index}"
+                expected_backward = f"Index Only Scan Backward using {index}"
+                ok = expected in plan or expected_backward in plan
+                failures += not ok
+                scans = [line.strip().lstrip("-> ") for line in plan.splitlines() if "Scan" in line]
+                print(f"{'ok  ' if ok else 'FAIL'} {description} (order_by={order_by})")
+                for scan in scans:
+                    print(f"       {scan}")
+                if args.verbose or not ok:
+                    print(plan)
+                print()
+    finally:
+        await dispose_engine()
+
+    if failures:
+        print(f"{failures} of {len(SCENARIOS)} listings are not index-only scans")
+        return 1
+    print(f"all {len(SCENARIOS)} listings are index-only scans")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
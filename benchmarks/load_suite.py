@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+"""
+Load benchmark for the API's hot paths.
+
+Starts the app with uvicorn against the database configured in .env, drives
+each scenario with concurrent HTTP clients and reports throughput, p50/p95/p99
+latency and SQL statements per request (from the db_queries_total metric, so
+the app runs as a single worker). Results are written as JSON so runs can be
+compared across commits; with --baseline the run fails when a scenario
+regresses by more than --max-regression percent.
+
+Scenarios:
+    login         POST /api/auth/login (one bcrypt verify per request)
+    users_me      GET /api/users/me
+    users_list    GET /api/users/?limit=N, once per --page-sizes entry
+    create_user   POST /api/users/ (users are deleted afterwards)
+    role_patch    PATCH /api/users/{id}/role, alternating USER and MANAGER
+
+    python manage.py bench [--duration 10] [--concurrency 10] [--scenarios login,users_me]
+    python manage.py bench --baseline benchmarks/results/<old>.json --max-regression 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+SCENARIOS = ("login", "users_me", "users_list", "create_user", "role_patch")
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    # The login scenario repeats one identifier far beyond the login rate limit
+    env.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, server: Optional[subprocess.Popen], timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server is not None and server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                if (await client.get("/api/health/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s")
+
+
+async def db_query_count(client: httpx.AsyncClient) -> float:
+    """Total SQL statements executed by the server so far"""
+    response = await client.get("/api/health/metrics")
+    response.raise_for_status()
+    total = 0.0
+    for line in response.text.splitlines():
+        if line.startswith("db_queries_total{"):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float, queries: float) -> Dict[str, Any]:
+    count = len(latencies)
+    result: Dict[str, Any] = {
+        "requests": count,
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "db_queries_per_request": round(queries / count, 2) if count else None,
+    }
+    if count >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        result["latency_ms"] = {
+            "p50": round(cuts[49] * 1000, 3),
+            "p95": round(cuts[94] * 1000, 3),
+            "p99": round(cuts[98] * 1000, 3),
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        }
+    return result
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    make_request: RequestFactory,
+    *,
+    duration: float,
+    concurrency: int,
+    warmup: int,
+) -> Dict[str, Any]:
+    """Send requests from `concurrency` workers for `duration` seconds"""
+    for i in range(warmup):
+        await make_request(client, -1 - i)
+
+    latencies: List[float] = []
+    errors = 0
+    sequence = 0
+    queries_before = await db_query_count(client)
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker() -> None:
+        nonlocal errors, sequence
+        while time.perf_counter() < deadline:
+            sequence += 1
+            request_started = time.perf_counter()
+            response = await make_request(client, sequence)
+            latencies.append(time.perf_counter() - request_started)
+            if response.status_code >= 400:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    queries = await db_query_count(client) - queries_before
+    return summarize(latencies, errors, elapsed, queries)
+
+
+async def run_suite(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        response = await client.post(
+            "/api/auth/login", data={"username": args.username, "password": args.password}
+        )
+        response.raise_for_status()
+        auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        run_id = uuid.uuid4().hex[:8]
+        created_ids: List[int] = []
+
+        async def login(c: httpx.AsyncClient, n: int) -> httpx.Response:
+            return await c.post("/api/auth/login", data={"username": args.username, "password": args.password})
+
+        async def users_me(c: httpx.AsyncClient, n: int) -> httpx.Response:
+            return await c.get("/api/users/me", headers=auth)
+
+        def users_list(page_size: int) -> RequestFactory:
+            async def _request(c: httpx.AsyncClient, n: int) -> httpx.Response:
+                return await c.get("/api/users/", params={"limit": page_size}, headers=auth)
+            return _request
+
+        async def create_user(c: httpx.AsyncClient, n: int) -> httpx.Response:
+            response = await c.post(
+                "/api/users/",
+                json={
+                    "email": f"bench-{run_id}-{n}@bench.example.com",
+                    "username": f"bench-{run_id}-{n}",
+                    "password": "benchpassword",
+                },
+            )
+            if response.status_code == 201:
+                created_ids.append(response.json()["id"])
+            return response
+
+        role_target: Dict[str, int] = {}
+
+        async def role_patch(c: httpx.AsyncClient, n: int) -> httpx.Response:
+            role = "MANAGER" if n % 2 else "USER"
+            return await c.patch(
+                f"/api/users/{role_target['id']}/role", json={"role": role}, headers=auth
+            )
+
+        scenarios: Dict[str, RequestFactory] = {}
+        for name in args.scenarios:
+            if name == "users_list":
+                for page_size in args.page_sizes:
+                    scenarios[f"users_list_{page_size}"] = users_list(page_size)
+            else:
+                scenarios[name] = {
+                    "login": login,
+                    "users_me": users_me,
+                    "create_user": create_user,
+                    "role_patch": role_patch,
+                }[name]
+
+        results: Dict[str, Any] = {}
+        try:
+            if "role_patch" in scenarios:
+                response = await create_user(client, 0)
+                response.raise_for_status()
+                role_target["id"] = response.json()["id"]
+
+            for name, make_request in scenarios.items():
+                print(f"Running {name} for {args.duration}s at concurrency {args.concurrency}...")
+                results[name] = await run_scenario(
+                    client,
+                    make_request,
+                    duration=args.duration,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                )
+        finally:
+            for user_id in created_ids:
+                await client.delete(f"/api/users/{user_id}", headers=auth)
+        return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Scenarios whose throughput fell or p95 latency rose by more than max_regression percent"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous["throughput_rps"]:
+            drop = (previous["throughput_rps"] - current["throughput_rps"]) / previous["throughput_rps"] * 100
+            if drop > max_regression:
+                regressions.append(
+                    f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s (-{drop:.1f}%)"
+                )
+        old_p95 = previous.get("latency_ms", {}).get("p95")
+        new_p95 = current.get("latency_ms", {}).get("p95")
+        if old_p95 and new_p95:
+            rise = (new_p95 - old_p95) / old_p95 * 100
+            if rise > max_regression:
+                regressions.append(f"{name}: p95 {old_p95} -> {new_p95} ms (+{rise:.1f}%)")
+    return regressions
+
+
+def print_table(scenarios: Dict[str, Any]) -> None:
+    print()
+    print(f"{'scenario':<18} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries/req':>12} {'errors':>7}")
+    for name, result in scenarios.items():
+        latency = result.get("latency_ms", {})
+        queries = result["db_queries_per_request"]
+        print(
+            f"{name:<18} {result['throughput_rps']:>9.1f} {latency.get('p50', 0):>9.2f} "
+            f"{latency.get('p95', 0):>9.2f} {latency.get('p99', 0):>9.2f} "
+            f"{queries if queries is not None else '-':>12} {result['errors']:>7}"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated scenarios (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests before each scenario")
+    parser.add_argument("--page-sizes", default="10,50,100", help="page sizes for users_list")
+    parser.add_argument("--username", default="admin", help="admin login used by the scenarios")
+    parser.add_argument("--password", default="adminpassword")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=10,
+                        help="percent drop in throughput or rise in p95 that fails the run (default: 10)")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.page_sizes = [int(size) for size in args.page_sizes.split(",") if size.strip()]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port)
+
+    try:
+        asyncio.run(wait_until_ready(base_url, server))
+        scenarios = asyncio.run(run_suite(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    revision = git_revision()
+    started = datetime.now(timezone.utc)
+    results = {
+        "meta": {
+            "commit": revision,
+            "timestamp": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "duration_seconds": args.duration,
+            "concurrency": args.concurrency,
+            "url": args.url,
+        },
+        "scenarios": scenarios,
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{started:%Y%m%dT%H%M%S}-{revision or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_table(scenarios)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\nRegressions beyond {args.max_regression}% against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.max_regression}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
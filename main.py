@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -7,9 +8,15 @@ from fastapi.exceptions import RequestValidationError
 from loguru import logger
 
 from app.api.api import api_router
+from app.api.serialization import NegotiatedJSONResponse, NegotiatedORJSONResponse
 from app.core.config import settings
 from app.core.middleware.error_handler import ErrorHandlerMiddleware, validation_exception_handler
+from app.core.middleware.metrics import MetricsMiddleware
+from app.core.middleware.negotiation import ContentNegotiationMiddleware
 from app.core.logging import setup_logging
+from app.core.revocation import revocation_list
+from app.core.security import password_hash_pool
+from app.database import dispose_engine, warm_up_pool
 
 
 @asynccontextmanager
@@ -20,12 +27,24 @@ async def lifespan(app: FastAPI):
     logger.info("Application starting up...")
     
     # Perform startup activities
+    warmup = settings.DB_POOL_WARMUP if settings.DB_POOL_WARMUP is not None else settings.DB_POOL_SIZE
+    warmed = await warm_up_pool(warmup)
+    logger.info(f"Warmed {warmed} database connection(s)")
+    try:
+        revoked = await revocation_list.sync()
+        logger.info(f"Loaded {revoked} revoked token(s)")
+    except Exception as e:
+        logger.warning(f"Could not load revoked tokens, retrying in the background: {e}")
+    revocation_sync = asyncio.create_task(revocation_list.sync_forever())
     logger.info("Startup complete")
     
     yield  # Application runs here
     
     # Perform cleanup when application is shutting down
     logger.info("Application shutting down...")
+    revocation_sync.cancel()
+    password_hash_pool.shutdown()
+    await dispose_engine()
 
 
 app = FastAPI(
@@ -34,6 +53,7 @@ app = FastAPI(
     description="FastAPI User Management System with PostgreSQL and JWT authentication",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=NegotiatedORJSONResponse if settings.FAST_JSON_RESPONSES else NegotiatedJSONResponse,
 )
 
 # Set all CORS enabled origins
@@ -48,6 +68,12 @@ app.add_middleware(
 # Add custom error handling middleware
 app.add_middleware(ErrorHandlerMiddleware)
 
+# Choose JSON, MessagePack or NDJSON bodies from the Accept header
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Record request metrics (added last so it wraps everything, including error responses)
+app.add_middleware(MetricsMiddleware)
+
 # Add exception handlers
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
@@ -3,9 +3,8 @@ import click
 import subprocess
 import sys
 import os
-import asyncio
+from collections import defaultdict
 from dotenv import load_dotenv
-import uvicorn
 
 # Load environment variables
 load_dotenv()
@@ -13,7 +12,8 @@ load_dotenv()
 # Add the current directory to the path so we can import our app
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from app.db_init import init_db
+# Commands import the app, uvicorn or gunicorn themselves, so commands that don't
+# need them (e.g. the alembic wrappers) start without loading the whole app
 
 
 @click.group()
@@ -24,7 +24,9 @@ def cli():
 
 @cli.command()
 def run():
-    """Run the application server."""
+    """Run the development server with auto-reload."""
+    import uvicorn
+
     click.echo("Starting application server...")
     uvicorn.run(
         "main:app", 
@@ -34,9 +36,107 @@ def run():
     )
 
 
+@cli.command()
+@click.option("--bind", "-b", default="0.0.0.0:8000", show_default=True, help="Address to listen on (host:port or unix:path).")
+@click.option("--workers", "-w", type=int, envvar="WEB_CONCURRENCY", help="Worker processes (default: CPU count, or $WEB_CONCURRENCY).")
+@click.option("--max-requests", type=int, default=10000, show_default=True, help="Restart a worker after this many requests (0 disables).")
+@click.option("--max-requests-jitter", type=int, default=1000, show_default=True, help="Random extra requests before a restart, so workers don't recycle together.")
+@click.option("--keepalive", type=int, default=5, show_default=True, help="Seconds to keep idle client connections open.")
+@click.option("--timeout", type=int, default=30, show_default=True, help="Seconds a silent worker gets before it is killed and restarted.")
+@click.option("--graceful-timeout", type=int, default=30, show_default=True, help="Seconds workers get to finish requests on restart or shutdown.")
+@click.option("--preload/--no-preload", default=True, show_default=True, help="Import the app once in the master before forking workers.")
+@click.option("--log-level", default="info", show_default=True)
+def serve(bind, workers, max_requests, max_requests_jitter, keepalive, timeout, graceful_timeout, preload, log_level):
+    """Run the application with gunicorn and uvicorn workers (uvloop, httptools) for production."""
+    from app.core.config import settings
+    from app.core.server import GunicornApplication, default_workers
+
+    workers = workers or default_workers()
+    if workers > 1 and settings.DB_REPLICA_URLS and settings.READ_YOUR_WRITES_BACKEND == "memory":
+        click.echo(
+            "Warning: read-your-writes markers are per worker with READ_YOUR_WRITES_BACKEND=memory; "
+            "set it to redis so every worker sends a recent writer's reads to the primary",
+            err=True,
+        )
+    principal_cache_on = settings.PRINCIPAL_CACHE_MAX_SIZE > 0 and settings.PRINCIPAL_CACHE_TTL_SECONDS > 0
+    if workers > 1 and principal_cache_on and settings.PRINCIPAL_CACHE_BACKEND == "memory":
+        click.echo(
+            "Warning: principal cache invalidations are per worker with PRINCIPAL_CACHE_BACKEND=memory; "
+            "other workers keep serving a changed role or is_active for up to "
+            f"PRINCIPAL_CACHE_TTL_SECONDS ({settings.PRINCIPAL_CACHE_TTL_SECONDS:g}s). Set it to redis to share them",
+            err=True,
+        )
+    if workers > 1 and settings.RESPONSE_CACHE_ENABLED and settings.RESPONSE_CACHE_BACKEND == "memory":
+        click.echo(
+            "Warning: cached GET /users responses are per worker with RESPONSE_CACHE_BACKEND=memory; "
+            "other workers serve pages from before a write for up to RESPONSE_CACHE_TTL_SECONDS + "
+            "RESPONSE_CACHE_STALE_SECONDS. Set it to redis, or leave RESPONSE_CACHE_ENABLED unset",
+            err=True,
+        )
+
+    application = GunicornApplication(
+        "main:app",
+        {
+            "bind": bind,
+            "workers": workers,
+            "max_requests": max_requests,
+            "max_requests_jitter": max_requests_jitter,
+            "keepalive": keepalive,
+            "timeout": timeout,
+            "graceful_timeout": graceful_timeout,
+            "preload_app": preload,
+            "loglevel": log_level,
+        },
+    )
+    click.echo("Starting production server with:")
+    for name, value in application.effective_config().items():
+        click.echo(f"  {name:<20} {value}")
+    application.run()
+
+
+@cli.command("startup-profile")
+@click.option("--module", default="main", show_default=True, help="Module to import.")
+@click.option("--top", type=int, default=20, show_default=True, help="Number of modules and packages to list.")
+def startup_profile(module, top):
+    """Report how long importing the app takes, by module and by package."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        click.echo(result.stderr, err=True)
+        sys.exit(result.returncode)
+
+    # Lines look like "import time:       self [us] |  cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    total_us = sum(self_us for _, self_us, _ in modules)
+    by_package = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    click.echo(f"Importing {module}: {total_us / 1000:.1f} ms across {len(modules)} modules\n")
+    click.echo("Slowest modules (cumulative, including their imports):")
+    for name, _, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        click.echo(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
+    click.echo("\nTime by top-level package (own import time only):")
+    for name, self_us in sorted(by_package.items(), key=lambda p: p[1], reverse=True)[:top]:
+        click.echo(f"  {self_us / 1000:>8.1f} ms  {100 * self_us / total_us:>5.1f}%  {name}")
+
+
 @cli.command()
 def init_database():
     """Initialize the database with tables and admin user."""
+    import asyncio
+    from app.db_init import init_db
+
     click.echo("Initializing database...")
     asyncio.run(init_db())
     click.echo("Database initialized successfully!")
@@ -83,5 +183,14 @@ def current():
     subprocess.run(["alembic", "current"])
 
 
+@cli.command(context_settings={"ignore_unknown_options": True, "allow_extra_args": True})
+@click.pass_context
+def bench(ctx):
+    """Run the load benchmark suite (options are passed to benchmarks/load_suite.py)."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "load_suite.py")
+    result = subprocess.run([sys.executable, script, *ctx.args])
+    sys.exit(result.returncode)
+
+
 if __name__ == "__main__":
     cli()
@@ -44,6 +44,17 @@ encoded_pass = quote_plus(db_pass)
 url = f"postgresql://{db_user}:{encoded_pass}@{db_host}/{db_name}"
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Keep autogenerate from dropping the pg_trgm indexes. The add_user_search_indexes
+    migration creates them only where the extension is available, so they are
+    not declared on the models.
+    """
+    if type_ == "index" and reflected and compare_to is None and name.endswith("_trgm"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -58,6 +69,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -78,7 +90,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,44 @@
+"""Add composite indexes for filtered and sorted user listings
+
+Revision ID: add_user_filter_indexes
+Revises: add_user_search_indexes
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_user_filter_indexes'
+down_revision: Union[str, None] = 'add_user_search_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('users_general', 'users_freshcart')
+# Both end in id, so a filtered listing's page of ids (in id or created_at order)
+# can be read with an index-only scan
+INDEXES = {
+    'role_is_active_id': '(role, is_active, id)',
+    'created_at_id': '(created_at, id)',
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, and keeps the tables writable
+    # while the indexes are built
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for name, columns in INDEXES.items():
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{name} "
+                    f"ON {table} {columns}"
+                )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for name in INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{name}")
@@ -0,0 +1,64 @@
+"""Add prefix and trigram search indexes on user email and username
+
+Revision ID: add_user_search_indexes
+Revises: add_revoked_tokens_table
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic")
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_user_search_indexes'
+down_revision: Union[str, None] = 'add_revoked_tokens_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('users_general', 'users_freshcart')
+COLUMNS = ('email', 'username')
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, and keeps the tables writable
+    # while the indexes are built
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for column in COLUMNS:
+                # Byte-wise ("C") btree on lower(column) serves prefix searches,
+                # lower(column) LIKE 'abc%', in index order. Unlike text_pattern_ops
+                # it can also return rows sorted, so a capped search stops early
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{column}_prefix "
+                    f"ON {table} ((lower({column}) COLLATE \"C\"))"
+                )
+
+        # Trigram indexes serve substring searches (LIKE '%abc%'); pg_trgm ships
+        # with the contrib package, so skip them where it isn't installed
+        bind = op.get_bind()
+        available = bind.execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).scalar()
+        if not available:
+            logger.warning("pg_trgm is not available; substring search will not be indexed")
+            return
+
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table in TABLES:
+            for column in COLUMNS:
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{column}_trgm "
+                    f"ON {table} USING gin (lower({column}) gin_trgm_ops)"
+                )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for column in COLUMNS:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{column}_trgm")
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{column}_prefix")